@@ -0,0 +1,40 @@
+"""Micro-benchmark of the blog renderer: time per render and stored size, inline vs shared CSS
+
+Run from backend/: python benchmarks/html_renderer.py [--iterations N]
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.blog_renderer import BlogRenderer
+
+SUMMARY = {
+    "title": "How Sleep Shapes Memory: What New Research Tells Us",
+    "introduction": "Ever wondered why a good night's sleep helps you remember? " * 4,
+    "key_points": [
+        {"heading": f"Key finding {i}", "content": "Researchers observed that <consolidation> & replay matter. " * 6}
+        for i in range(5)
+    ],
+    "conclusion": "Sleep is an active process that strengthens what we learn. " * 3,
+    "implications": [f"Practical takeaway number {i} for students & teachers" for i in range(4)]
+}
+PAPER = {"author": "A. Researcher et al.", "upload_date": "2025-01-01"}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    for label, renderer in (
+        ("inline css", BlogRenderer()),
+        ("shared css", BlogRenderer(css_url="https://example.org/api/assets/blog.css"))
+    ):
+        html = renderer.render(SUMMARY, PAPER)
+        seconds = min(timeit.repeat(lambda: renderer.render(SUMMARY, PAPER), number=args.iterations, repeat=3))
+        print(f"{label:>10}: {seconds / args.iterations * 1e6:8.1f} us/render, {len(html.encode()):6d} bytes stored")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Load test of the paper API with concurrent virtual users
+
+Uploaders post PDFs, pollers check paper status and readers fetch summaries
+and page through the paper list, ramping up over a configurable period and
+running for a fixed duration. By default the app runs in this process with a
+stub LLM and an in-memory Mongo stand-in (mongomock-motor); with --url the
+same traffic goes to a running server instead. The report gives throughput and
+latency percentiles per endpoint plus the event loop lag seen while under load.
+
+Run from backend/:
+    python benchmarks/load_test.py --uploaders 2 --pollers 20 --readers 20 --duration 60
+    python benchmarks/load_test.py --url http://localhost:8001 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from paper_pipeline import create_benchmark_pdf, load_server, percentile
+
+class LoadStats:
+    """Latency and status samples per endpoint"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, status: int):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, elapsed: float) -> Dict[str, Dict]:
+        return {
+            endpoint: {
+                "requests": len(samples),
+                "requests_per_sec": round(len(samples) / elapsed, 2),
+                "errors": self.errors[endpoint] + sum(
+                    count for status, count in self.statuses[endpoint].items() if status >= 500
+                ),
+                "statuses": dict(self.statuses[endpoint]),
+                "p50_ms": round(percentile(samples, 0.5) * 1000, 2),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2)
+            }
+            for endpoint, samples in sorted(self.latencies.items())
+        }
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def report(self) -> Dict[str, float]:
+        return {
+            "p50_ms": round(percentile(self.samples, 0.5) * 1000, 2),
+            "p99_ms": round(percentile(self.samples, 0.99) * 1000, 2),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 2)
+        }
+
+class LoadTest:
+    """Runs the virtual users against one client until the deadline"""
+
+    def __init__(self, client: httpx.AsyncClient, pdf: bytes, args):
+        self.client = client
+        self.pdf = pdf
+        self.args = args
+        self.stats = LoadStats()
+        self.paper_ids: List[str] = []
+        self.deadline = 0.0
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.errors[endpoint] += 1
+            self.stats.latencies[endpoint].append(time.perf_counter() - started)
+            return None
+        self.stats.record(endpoint, time.perf_counter() - started, response.status_code)
+        return response
+
+    async def upload(self):
+        # A unique trailer gives every upload its own content hash, so none is deduplicated
+        content = self.pdf + f"\n% {uuid.uuid4()}\n".encode()
+        response = await self.request(
+            "upload_paper", "POST", "/api/papers/upload",
+            files={"file": ("load-test.pdf", content, "application/pdf")}
+        )
+        if response is not None and response.status_code == 200:
+            self.paper_ids.append(response.json()["id"])
+
+    async def poll(self):
+        if self.paper_ids:
+            await self.request("get_paper_status", "GET", f"/api/papers/{random.choice(self.paper_ids)}/status")
+
+    async def read(self):
+        if self.paper_ids and random.random() < 0.5:
+            await self.request("get_paper_summary", "GET", f"/api/papers/{random.choice(self.paper_ids)}/summary")
+        else:
+            await self.request("list_papers", "GET", "/api/papers", params={"limit": 20})
+
+    async def user(self, action, start_delay: float, think_time: float):
+        await asyncio.sleep(start_delay)
+        while time.perf_counter() < self.deadline:
+            await action()
+            await asyncio.sleep(think_time)
+
+    async def run(self) -> float:
+        roles = (
+            [(self.upload, self.args.upload_interval)] * self.args.uploaders
+            + [(self.poll, self.args.think_time)] * self.args.pollers
+            + [(self.read, self.args.think_time)] * self.args.readers
+        )
+        random.shuffle(roles)
+        started = time.perf_counter()
+        self.deadline = started + self.args.ramp_up + self.args.duration
+        # Users start evenly spread over the ramp-up period
+        await asyncio.gather(*(
+            self.user(action, self.args.ramp_up * index / len(roles), think_time)
+            for index, (action, think_time) in enumerate(roles)
+        ))
+        return time.perf_counter() - started
+
+async def main_async(args) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / "load-test.pdf"
+        create_benchmark_pdf(pdf_path, args.pages)
+        pdf = pdf_path.read_bytes()
+        limits = httpx.Limits(max_connections=args.uploaders + args.pollers + args.readers)
+
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+            app = None
+        else:
+            app = load_server(args, str(Path(tmp) / "uploads"), configure_pipeline=False).app
+            # Otherwise every request of the load test would be logged
+            logging.getLogger("httpx").setLevel(logging.WARNING)
+            # ASGITransport does not send lifespan events, so run the startup hooks here
+            await app.router.startup()
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load-test", timeout=args.timeout)
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        try:
+            async with client:
+                load_test = LoadTest(client, pdf, args)
+                elapsed = await load_test.run()
+        finally:
+            await monitor.stop()
+            if app is not None:
+                await app.router.shutdown()
+
+    return {
+        "config": vars(args),
+        "elapsed_sec": round(elapsed, 2),
+        "papers_uploaded": len(load_test.paper_ids),
+        "endpoints": load_test.stats.report(elapsed),
+        # Against --url this is the lag of the load generator, not of the server
+        "event_loop_lag": monitor.report()
+    }
+
+def print_report(results: Dict):
+    print(f"{'endpoint':<20}{'req':>8}{'req/s':>9}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, stats in results["endpoints"].items():
+        print(
+            f"{endpoint:<20}{stats['requests']:>8}{stats['requests_per_sec']:>9}{stats['errors']:>6}"
+            f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}"
+        )
+    lag = results["event_loop_lag"]
+    print(f"event loop lag: p50 {lag['p50_ms']} ms, p99 {lag['p99_ms']} ms, max {lag['max_ms']} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running server; runs the app in-process when omitted")
+    parser.add_argument("--uploaders", type=int, default=2, help="virtual users uploading papers")
+    parser.add_argument("--pollers", type=int, default=10, help="virtual users polling paper status")
+    parser.add_argument("--readers", type=int, default=10, help="virtual users reading summaries and the paper list")
+    parser.add_argument("--duration", type=float, default=30, help="seconds at full load after ramp-up")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.1, help="pause between a poller's or reader's requests")
+    parser.add_argument("--upload-interval", type=float, default=1.0, help="pause between an uploader's requests")
+    parser.add_argument("--pages", type=int, default=10, help="pages of the uploaded PDF")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per stub LLM call (in-process only)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print_report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, default=str) + "\n")
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
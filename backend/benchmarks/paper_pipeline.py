@@ -0,0 +1,291 @@
+"""Offline end-to-end benchmark of the paper pipeline with a stub LLM and in-memory storage
+
+Synthetic PDFs of several sizes go through server.py's own process_paper_async
+and extract -> summarize -> render pipeline, including progress writes and
+response precompression. LlmChat is replaced by a deterministic stand-in with
+configurable latency and Mongo by mongomock-motor, so runs need no network and
+are repeatable. Results are only compared with a baseline recorded with the
+same settings; settings not given on the command line are taken from it.
+
+Run from backend/:
+    python benchmarks/paper_pipeline.py                  # compare with baseline.json
+    python benchmarks/paper_pipeline.py --save-baseline  # record a new baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+SUMMARY_RESPONSE = json.dumps({
+    "title": "Machine Learning in Healthcare, Explained",
+    "introduction": "Computers are learning to spot patterns in medical data that people miss.",
+    "key_points": [
+        {"heading": f"Finding {i}", "content": "Models trained on patient records predicted outcomes accurately."}
+        for i in range(1, 5)
+    ],
+    "conclusion": "Machine learning is becoming a practical tool for clinicians.",
+    "implications": ["Earlier diagnosis", "Better treatment plans", "More research on fairness"]
+})
+
+MAP_RESPONSE = "- The section reviews supervised models\n- Accuracy improved over baselines\n- Data quality matters"
+
+PARAGRAPH = (
+    "Machine learning has changed how clinicians analyse patient data. We compare supervised, "
+    "unsupervised and deep learning methods across diagnosis, treatment planning and outcome "
+    "prediction, and report accuracy, calibration and the cost of collecting labelled data."
+)
+
+class StubLlmChat:
+    """Deterministic stand-in for LlmChat that answers after a fixed latency"""
+
+    latency = 0.5
+
+    def __init__(self, api_key: str, session_id: str, system_message: str):
+        self.session_id = session_id
+
+    def with_model(self, provider: str, model: str) -> "StubLlmChat":
+        return self
+
+    async def send_message(self, message) -> str:
+        await asyncio.sleep(self.latency)
+        # Map-reduce chunk prompts ask for notes, the final prompt for the JSON summary
+        return SUMMARY_RESPONSE if "Format your response as JSON" in message.text else MAP_RESPONSE
+
+def create_benchmark_pdf(path: Path, pages: int):
+    """Paper-like PDF with a title page and one numbered section per page"""
+    c = canvas.Canvas(str(path), pagesize=letter)
+    for page in range(pages):
+        y = 750
+        if page == 0:
+            c.setFont("Helvetica-Bold", 16)
+            c.drawString(72, y, "Machine Learning in Healthcare: A Comprehensive Review")
+            c.setFont("Helvetica", 12)
+            c.drawString(72, y - 30, "by Dr. Sarah Johnson")
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(72, y - 70, "Abstract")
+            y -= 90
+        else:
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(72, y, f"{page}. Section {page}")
+            y -= 20
+        c.setFont("Helvetica", 10)
+        while y > 72:
+            for start in range(0, len(PARAGRAPH), 95):
+                c.drawString(72, y, PARAGRAPH[start:start + 95])
+                y -= 14
+            y -= 10
+        c.showPage()
+    c.save()
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process and its largest worker (ru_maxrss is in KB on Linux)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round((own + children) / 1024, 1)
+
+def load_server(args, upload_folder: str, configure_pipeline: bool = True):
+    """Import the server against an in-memory Mongo and the stub LLM
+
+    With configure_pipeline the summary mode, PDF pool and stage concurrency
+    come from the benchmark's args; otherwise the server keeps its own settings.
+    """
+    import mongomock_motor
+    import motor.motor_asyncio
+    os.environ.pop('LLM_STREAMING', None)
+    os.environ.update({
+        'UPLOAD_FOLDER': upload_folder,
+        # Never sent anywhere: every LLM call goes to the stub
+        'EMERGENT_LLM_KEY': 'benchmark',
+        # Every paper has the same text, so cached responses would skip the stub's latency
+        'LLM_CACHE': 'false'
+    })
+    if configure_pipeline:
+        os.environ.update({
+            'SUMMARY_MODE': 'map_reduce' if args.map_reduce else 'excerpt',
+            'PDF_WORKERS': str(args.pool_workers),
+            'PDF_PAGES_PER_TASK': str(args.pages_per_task),
+            'EXTRACT_CONCURRENCY': str(args.extract_workers),
+            'SUMMARIZE_CONCURRENCY': str(args.summarize_workers)
+        })
+    # Must be patched before server creates its client at import time
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    import server
+    StubLlmChat.latency = args.llm_latency
+    server.llm_client.chat_factory = StubLlmChat
+    logging.getLogger("server").setLevel(logging.WARNING)
+    return server
+
+async def run_size(server, pdf_path: Path, papers: int) -> Dict:
+    """Process `papers` copies of one PDF concurrently through the server's own pipeline"""
+    from models import Paper
+
+    # Per-stage run times come from the pipeline itself; start each size from empty windows
+    for stage in server.pipeline.stages:
+        stage.runs = deque(maxlen=max(papers, 256))
+    paper_docs = [
+        Paper(filename=f"paper-{i}.pdf", file_path=str(pdf_path), file_size=pdf_path.stat().st_size).dict()
+        for i in range(papers)
+    ]
+    await server.db.papers.insert_many(paper_docs)
+
+    paper_seconds: List[float] = []
+
+    async def process(paper_id: str):
+        started = time.perf_counter()
+        # Progress writes, the pipeline stages and the final status, as run by the job queue
+        await server.process_paper_async(paper_id)
+        paper_seconds.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(doc['id']) for doc in paper_docs))
+    elapsed = time.perf_counter() - started
+
+    timings = {stage.name: list(stage.runs) for stage in server.pipeline.stages}
+    timings["paper"] = paper_seconds
+    return {
+        "papers_per_min": round(papers / elapsed * 60, 2),
+        "stages": {
+            name: {
+                "p50_ms": round(percentile(samples, 0.5) * 1000, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2)
+            }
+            for name, samples in timings.items()
+        }
+    }
+
+# Settings that change the results; runs that differ in any of them are not comparable
+COMPARED_CONFIG = ("papers", "llm_latency", "map_reduce", "pool_workers", "pages_per_task", "extract_workers", "summarize_workers")
+
+# Compared settings used when neither a flag nor the baseline gives them
+DEFAULT_CONFIG = {
+    "papers": 8,
+    "llm_latency": 0.5,
+    "map_reduce": False,
+    "pool_workers": os.cpu_count() or 1,
+    "pages_per_task": 25,
+    "extract_workers": os.cpu_count() or 1,
+    "summarize_workers": 4
+}
+
+def config_differences(config: Dict, baseline_config: Dict) -> List[str]:
+    return [
+        f"{key}: {config.get(key)} vs {baseline_config.get(key)} in the baseline"
+        for key in COMPARED_CONFIG
+        if config.get(key) != baseline_config.get(key)
+    ]
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Describe every metric that is more than `tolerance` worse than the baseline"""
+    regressions = []
+    for size, result in results["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if not base:
+            continue
+        if result["papers_per_min"] < base["papers_per_min"] * (1 - tolerance):
+            regressions.append(f"{size} pages: {result['papers_per_min']} papers/min vs {base['papers_per_min']} baseline")
+        for stage, stats in result["stages"].items():
+            base_stats = base["stages"].get(stage)
+            # Sub-millisecond stages are too noisy to compare
+            if base_stats and base_stats["p99_ms"] >= 1 and stats["p99_ms"] > base_stats["p99_ms"] * (1 + tolerance):
+                regressions.append(f"{size} pages, {stage}: p99 {stats['p99_ms']} ms vs {base_stats['p99_ms']} ms baseline")
+    if results["peak_rss_mb"] > baseline.get("peak_rss_mb", float("inf")) * (1 + tolerance):
+        regressions.append(f"peak RSS {results['peak_rss_mb']} MB vs {baseline['peak_rss_mb']} MB baseline")
+    return regressions
+
+async def main_async(args) -> Dict:
+    results = {"config": {key: value for key, value in vars(args).items() if key not in ("baseline", "save_baseline")}, "sizes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        server = load_server(args, str(Path(tmp) / "uploads"))
+        await server.pipeline.start()
+        try:
+            # Start every pool worker first so process spawn time is not measured
+            warmup_path = Path(tmp) / "warmup.pdf"
+            create_benchmark_pdf(warmup_path, 1)
+            await asyncio.gather(*(server.pdf_processor.extract_text_from_file(str(warmup_path)) for _ in range(args.pool_workers * 2)))
+
+            for pages in args.sizes:
+                pdf_path = Path(tmp) / f"paper-{pages}.pdf"
+                create_benchmark_pdf(pdf_path, pages)
+                results["sizes"][str(pages)] = await run_size(server, pdf_path, args.papers)
+                print(f"{pages:>4} pages: {results['sizes'][str(pages)]['papers_per_min']:8.2f} papers/min")
+        finally:
+            await server.pipeline.stop()
+            await server.progress_tracker.flush_all()
+            await server.llm_client.close()
+            server.pdf_processor.executor.shutdown()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 20, 100, 500], help="PDF page counts")
+    # The compared settings default to the baseline's, then to DEFAULT_CONFIG
+    parser.add_argument("--papers", type=int, help="papers processed per size")
+    parser.add_argument("--llm-latency", type=float, help="seconds per stub LLM call")
+    parser.add_argument("--map-reduce", action="store_true", default=None, help="summarize the full text in chunks")
+    parser.add_argument("--pool-workers", type=int)
+    parser.add_argument("--pages-per-task", type=int)
+    parser.add_argument("--extract-workers", type=int)
+    parser.add_argument("--summarize-workers", type=int)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown before failing")
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.save_baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+    defaults = {**DEFAULT_CONFIG, **{
+        key: value for key, value in (baseline or {}).get("config", {}).items() if key in COMPARED_CONFIG
+    }}
+    for key in COMPARED_CONFIG:
+        if getattr(args, key) is None:
+            setattr(args, key, defaults[key])
+    
+    if baseline is not None:
+        # Checked before running: a faster stub LLM or more workers would hide any regression
+        differences = config_differences(vars(args), baseline.get("config", {}))
+        if differences:
+            for difference in differences:
+                print(f"CONFIG MISMATCH {difference}")
+            print("Run with the baseline's settings, or record a new baseline with --save-baseline")
+            sys.exit(2)
+
+    results = asyncio.run(main_async(args))
+    print(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+    if baseline is None:
+        print("No baseline to compare with; run with --save-baseline first")
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -10,6 +10,12 @@ class ProcessingStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class KeyPoint(BaseModel):
     heading: str
     content: str
@@ -22,8 +28,12 @@ class Paper(BaseModel):
     upload_date: datetime = Field(default_factory=datetime.utcnow)
     file_path: str
     file_size: int
+    content_hash: Optional[str] = None
+    batch_id: Optional[str] = None
     status: ProcessingStatus = ProcessingStatus.UPLOADED
     processing_progress: int = 0
+    # Set when the stored summary is the generic fallback, which must not be reused
+    fallback_summary: bool = False
 
 class PaperCreate(BaseModel):
     filename: str
@@ -46,6 +56,7 @@ class Summary(BaseModel):
     key_points: List[KeyPoint]
     conclusion: str
     implications: List[str]
+    fallback: bool = False
     created_date: datetime = Field(default_factory=datetime.utcnow)
 
 class SummaryResponse(BaseModel):
@@ -59,9 +70,50 @@ class HtmlBlog(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     paper_id: str
     html_content: str
+    # Precompressed /html response bodies by content coding
+    encodings: Dict[str, bytes] = Field(default_factory=dict)
     created_date: datetime = Field(default_factory=datetime.utcnow)
 
 class ProcessingStatusResponse(BaseModel):
     status: ProcessingStatus
     progress: int
-    message: Optional[str] = None
\ No newline at end of file
+    message: Optional[str] = None
+
+class BatchRejection(BaseModel):
+    filename: str
+    error: str
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    total: int
+    status_counts: Dict[str, int]
+    progress: int
+    papers: List[PaperResponse]
+    rejected: List[BatchRejection] = []
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    paper_id: str
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    run_after: datetime = Field(default_factory=datetime.utcnow)
+    lease_expires: Optional[datetime] = None
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+    updated_date: datetime = Field(default_factory=datetime.utcnow)
+
+class UploadSession(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    filename: str
+    file_size: Optional[int] = None
+    created_date: datetime = Field(default_factory=datetime.utcnow)
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    file_size: Optional[int] = None
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    filename: str
+    offset: int
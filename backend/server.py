@@ -1,15 +1,34 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
 from models import *
 from services.pdf_processor import PDFProcessor
-from services.ai_summarizer import AISummarizer
+from services.ai_summarizer import AISummarizer, SYSTEM_MESSAGE
+from services.llm_client import LlmClient, RateLimiter
+from services.llm_cache import LlmResponseCache
+from services.blog_renderer import BlogRenderer
+from services.upload_store import UploadStore, UploadConflict, UploadRejected
+from services.job_queue import JobQueue
+from services.progress_tracker import ProgressTracker, TERMINAL_STATUSES
+from services.progress_events import ProgressBroker
+from services.json_stream import summary_events
+from services.db_indexes import IndexBuilder
+from services.pipeline import Pipeline, Stage
+from services.metrics import REGISTRY
+from services.diagnostics import LoopMonitor, SamplingProfiler
+from services.response_cache import CachedBody, ResponseCache, choose_encoding, compress_variants, etag_matches, make_etag
 import asyncio
-import shutil
+import hmac
+import json
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 ROOT_DIR = Path(__file__).parent
@@ -26,14 +45,73 @@ db_name = os.environ.get('DB_NAME', 'academic_summarizer')
 client = AsyncIOMotorClient(mongo_url)
 db = client[db_name]
 
+# PDF extraction runs in a process pool so PyPDF2 never holds the event loop.
+# "spawn" avoids forking the running loop and the Mongo client's threads.
+# The processor replaces the pool if a worker dies, e.g. when a large PDF is OOM-killed.
+def create_pdf_executor() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=int(os.environ.get('PDF_WORKERS', os.cpu_count() or 1)),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
 # Initialize services
-pdf_processor = PDFProcessor()
-ai_summarizer = AISummarizer()
+pdf_processor = PDFProcessor(
+    pages_per_task=int(os.environ.get('PDF_PAGES_PER_TASK', 25)),
+    executor_factory=create_pdf_executor
+)
+# Persistent LLM responses, so retries and reruns of an unchanged prompt cost nothing;
+# LLM_CACHE_BYPASS forces fresh responses while still storing them
+llm_cache = None
+if os.environ.get('LLM_CACHE', 'true').lower() in ('1', 'true', 'yes'):
+    llm_cache = LlmResponseCache(
+        db.llm_cache,
+        ttl_seconds=int(os.environ.get('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600)),
+        max_entries=int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 10000)),
+        bypass=os.environ.get('LLM_CACHE_BYPASS', '').lower() in ('1', 'true', 'yes')
+    )
+# The LLM key is only ever read here and handed to the client
+llm_api_key = os.environ.get('EMERGENT_LLM_KEY')
+if not llm_api_key:
+    raise RuntimeError("EMERGENT_LLM_KEY must be set")
+# Shared LLM client: pooled keep-alive connections and a global rate limit
+llm_client = LlmClient(
+    api_key=llm_api_key,
+    system_message=SYSTEM_MESSAGE,
+    api_base=os.environ.get('LLM_API_BASE'),
+    rate_limiter=RateLimiter(
+        requests_per_minute=int(os.environ.get('LLM_REQUESTS_PER_MINUTE', 0)),
+        tokens_per_minute=int(os.environ.get('LLM_TOKENS_PER_MINUTE', 0))
+    ),
+    max_connections=int(os.environ.get('LLM_MAX_CONNECTIONS', 20)),
+    response_cache=llm_cache
+)
+# Blog posts link one shared stylesheet when its public URL is configured, otherwise inline it
+blog_renderer = BlogRenderer(css_url=os.environ.get('BLOG_CSS_URL'))
+# Streaming calls the provider through litellm rather than LlmChat, so it needs an
+# endpoint that accepts the key; without one every streamed call would fail and be re-sent
+llm_streaming = os.environ.get('LLM_STREAMING', '').lower() in ('1', 'true', 'yes')
+if llm_streaming and not llm_client.api_base:
+    raise RuntimeError("LLM_STREAMING requires LLM_API_BASE to point at an endpoint that accepts EMERGENT_LLM_KEY")
+ai_summarizer = AISummarizer(
+    llm_client,
+    streaming=llm_streaming,
+    map_reduce=os.environ.get('SUMMARY_MODE', 'excerpt') == 'map_reduce',
+    chunk_tokens=int(os.environ.get('SUMMARY_CHUNK_TOKENS', 3000)),
+    map_concurrency=int(os.environ.get('SUMMARY_MAP_CONCURRENCY', 4)),
+    prompt_tokens=int(os.environ.get('SUMMARY_PROMPT_TOKENS', 4000)),
+    blog_renderer=blog_renderer
+)
 
 # Create upload directory
 upload_folder = Path(os.environ.get('UPLOAD_FOLDER', '/app/uploads'))
 upload_folder.mkdir(exist_ok=True)
 
+# Uploaded PDFs are stored by content hash so repeat uploads share one file.
+# The size cap is enforced while bytes arrive, not after the body is spooled.
+max_upload_size = int(os.environ.get('MAX_UPLOAD_SIZE', 50 * 1024 * 1024))
+upload_store = UploadStore(upload_folder, max_size=max_upload_size)
+batch_max_files = int(os.environ.get('BATCH_MAX_FILES', 500))
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -42,241 +120,967 @@ api_router = APIRouter(prefix="/api")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Status changes are pushed to SSE/WebSocket subscribers as they happen
+progress_broker = ProgressBroker()
+
+# Progress changes are batched and written at most once per flush interval
+progress_tracker = ProgressTracker(
+    db.papers,
+    flush_interval_ms=int(os.environ.get('PROGRESS_FLUSH_INTERVAL_MS', 1000)),
+    broker=progress_broker
+)
+
+# Rendered summary/HTML responses and downloads, so hot papers never touch Mongo or disk
+response_cache = ResponseCache(
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+)
+# Outputs of a paper never change once written, so clients and CDNs may keep them
+result_cache_control = f"public, max-age={int(os.environ.get('RESULT_CACHE_MAX_AGE', 86400))}"
+
+# "on_demand" renders blog posts from the stored summary when first requested instead of
+# during processing; HTML_PERSIST decides whether they are then stored or only cached
+html_on_demand = os.environ.get('HTML_GENERATION', 'eager') == 'on_demand'
+html_persist = os.environ.get('HTML_PERSIST', 'true').lower() in ('1', 'true', 'yes')
+
+# Opt-in diagnostics: event loop lag metrics, stacks of callbacks that block the loop
+# and an on-demand sampling profiler behind the admin endpoints, which need ADMIN_TOKEN
+diagnostics_enabled = os.environ.get('DIAGNOSTICS', '').lower() in ('1', 'true', 'yes')
+loop_monitor = LoopMonitor(
+    interval=int(os.environ.get('LOOP_LAG_INTERVAL_MS', 100)) / 1000,
+    slow_callback=int(os.environ.get('SLOW_CALLBACK_MS', 100)) / 1000
+)
+profiler = SamplingProfiler(max_seconds=int(os.environ.get('PROFILE_MAX_SECONDS', 60)))
+admin_token = os.environ.get('ADMIN_TOKEN')
+
+def html_response_body(html_content: str) -> bytes:
+    """Exact bytes served by GET /papers/{id}/html"""
+    return json.dumps({"html_content": html_content}).encode()
+
+# Summary fields already produced for papers being summarized, replayed to late subscribers
+summary_partials: Dict[str, List[Dict]] = {}
+
+def summary_channel(paper_id: str) -> str:
+    return f"{paper_id}:summary"
+
+def publish_summary_event(paper_id: str, event: str, data=None):
+    """Record and push a partial summary event for a paper"""
+    if event == "reset":
+        summary_partials[paper_id] = []
+    elif paper_id in summary_partials:
+        summary_partials[paper_id].append({"event": event, "data": data})
+    progress_broker.publish(summary_channel(paper_id), {"event": event, "data": data})
+
+async def extract_stage(context: Dict) -> Dict:
+    """Extract and parse the PDF text in the process pool"""
+    paper_id = context['paper_id']
+    text_content = await pdf_processor.extract_text_from_file(context['file_path'])
+    
+    # Update progress
+    await progress_tracker.update(paper_id, processing_progress=50)
+    
+    # Parse academic paper structure
+    paper_data = await pdf_processor.parse_academic_paper_async(text_content)
+    
+    # Update paper with extracted metadata
+    await progress_tracker.update(
+        paper_id,
+        original_title=paper_data['title'],
+        author=paper_data['author'],
+        processing_progress=70
+    )
+    return {**context, "paper_data": paper_data}
+
+async def summarize_stage(context: Dict) -> Dict:
+    """Generate the accessible summary, pushing fields as they complete"""
+    paper_id = context['paper_id']
+    
+    async def on_partial(field, value):
+        publish_summary_event(paper_id, field, value)
+    
+    publish_summary_event(paper_id, "reset")
+    summary_data = await ai_summarizer.create_accessible_summary(
+        context['paper_data'],
+        on_partial=on_partial,
+        session_id=f"paper-{paper_id}"
+    )
+    
+    # Update progress
+    await progress_tracker.update(paper_id, processing_progress=85)
+    return {**context, "summary_data": summary_data}
+
+async def render_stage(context: Dict) -> Dict:
+    """Store the summary and its HTML blog post"""
+    paper_id = context['paper_id']
+    summary_data = context['summary_data']
+    
+    # Create and store summary
+    summary = Summary(
+        paper_id=paper_id,
+        title=summary_data['title'],
+        introduction=summary_data['introduction'],
+        key_points=[KeyPoint(**point) for point in summary_data['key_points']],
+        conclusion=summary_data['conclusion'],
+        implications=summary_data['implications'],
+        fallback=summary_data.get('fallback', False)
+    )
+    
+    # One summary per paper, so reprocessing replaces the previous one
+    await db.summaries.replace_one({"paper_id": paper_id}, summary.dict(), upsert=True)
+    response_cache.invalidate(paper_id)
+    summary_partials.pop(paper_id, None)
+    publish_summary_event(paper_id, "done")
+    
+    # Generate and store the HTML blog post now, unless it is rendered on first request
+    if not html_on_demand:
+        html_content = ai_summarizer.generate_html_blog(summary_data, context['paper_data'])
+        await store_html_blog(paper_id, html_content)
+    response_cache.invalidate(paper_id)
+    return {**context, "fallback_summary": summary.fallback}
+
+# Papers flow extract -> summarize -> render through bounded queues; each stage
+# has its own concurrency so the PDF pool and the LLM quota stay busy together
+pipeline_queue_size = int(os.environ.get('PIPELINE_QUEUE_SIZE', 32))
+pipeline = Pipeline([
+    Stage("extract", extract_stage, workers=int(os.environ.get('EXTRACT_CONCURRENCY', os.cpu_count() or 1)), queue_size=pipeline_queue_size),
+    Stage("summarize", summarize_stage, workers=int(os.environ.get('SUMMARIZE_CONCURRENCY', 4)), queue_size=pipeline_queue_size),
+    Stage("render", render_stage, workers=int(os.environ.get('RENDER_CONCURRENCY', 2)), queue_size=pipeline_queue_size)
+])
+
+PAPER_SECONDS = REGISTRY.histogram("paper_processing_seconds", "End-to-end processing time of a paper attempt", ["result"])
+JOB_QUEUE_DEPTH = REGISTRY.gauge("job_queue_depth", "Jobs waiting to be processed")
+
 async def process_paper_async(paper_id: str):
-    """Background task to process uploaded paper"""
+    """Process an uploaded paper; raises so the job queue can retry"""
+    started = time.perf_counter()
     try:
-        # Update status to processing
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {"status": ProcessingStatus.PROCESSING, "processing_progress": 10}}
-        )
-        
         # Get paper from database
         paper_doc = await db.papers.find_one({"id": paper_id})
         if not paper_doc:
             raise Exception("Paper not found")
         
+        # Update status to processing
+        await progress_tracker.update(paper_id, status=ProcessingStatus.PROCESSING, processing_progress=10)
+        
         # Read PDF file
         file_path = Path(paper_doc['file_path'])
         if not file_path.exists():
             raise Exception("PDF file not found")
         
         # Update progress
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {"processing_progress": 30}}
-        )
-        
-        # Extract text from PDF
-        with open(file_path, 'rb') as pdf_file:
-            pdf_content = pdf_file.read()
-        
-        text_content = pdf_processor.extract_text_from_pdf(pdf_content)
-        
-        # Update progress
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {"processing_progress": 50}}
-        )
-        
-        # Parse academic paper structure
-        paper_data = pdf_processor.parse_academic_paper(text_content)
-        
-        # Update paper with extracted metadata
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {
-                "original_title": paper_data['title'],
-                "author": paper_data['author'],
-                "processing_progress": 70
-            }}
-        )
-        
-        # Generate accessible summary using AI
-        summary_data = await ai_summarizer.create_accessible_summary(paper_data)
-        
-        # Update progress
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {"processing_progress": 85}}
-        )
-        
-        # Create and store summary
-        summary = Summary(
-            paper_id=paper_id,
-            title=summary_data['title'],
-            introduction=summary_data['introduction'],
-            key_points=[KeyPoint(**point) for point in summary_data['key_points']],
-            conclusion=summary_data['conclusion'],
-            implications=summary_data['implications']
-        )
-        
-        await db.summaries.insert_one(summary.dict())
+        await progress_tracker.update(paper_id, processing_progress=30)
         
-        # Generate HTML blog post
-        html_content = ai_summarizer.generate_html_blog(summary_data, paper_data)
+        result = await pipeline.submit({"paper_id": paper_id, "file_path": str(file_path)})
         
-        # Store HTML blog
-        html_blog = HtmlBlog(
-            paper_id=paper_id,
-            html_content=html_content
-        )
-        
-        await db.html_blogs.insert_one(html_blog.dict())
-        
-        # Update status to completed
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {"status": ProcessingStatus.COMPLETED, "processing_progress": 100}}
+        # Update status to completed, written through immediately; fallback summaries
+        # are flagged in the same write so repeat uploads never reuse them
+        await progress_tracker.update(
+            paper_id,
+            status=ProcessingStatus.COMPLETED,
+            processing_progress=100,
+            fallback_summary=result['fallback_summary']
         )
         
+        PAPER_SECONDS.observe(time.perf_counter() - started, result="success")
         logger.info(f"Successfully processed paper {paper_id}")
         
     except Exception as e:
+        PAPER_SECONDS.observe(time.perf_counter() - started, result="error")
         logger.error(f"Error processing paper {paper_id}: {str(e)}")
-        await db.papers.update_one(
-            {"id": paper_id},
-            {"$set": {"status": ProcessingStatus.FAILED, "processing_progress": 0}}
+        await progress_tracker.finish(paper_id)
+        summary_partials.pop(paper_id, None)
+        raise
+
+async def store_html_blog(paper_id: str, html_content: str) -> Dict:
+    """Persist a blog post with its /html response precompressed once, off the event loop"""
+    html_blog = HtmlBlog(
+        paper_id=paper_id,
+        html_content=html_content,
+        encodings=await asyncio.to_thread(compress_variants, html_response_body(html_content))
+    )
+    await db.html_blogs.replace_one({"paper_id": paper_id}, html_blog.dict(), upsert=True)
+    return html_blog.dict()
+
+async def load_html_blog(paper_id: str) -> Optional[Dict]:
+    """Stored blog post of a paper; in on-demand mode it is rendered from the summary on first request"""
+    html_blog = await db.html_blogs.find_one({"paper_id": paper_id}, {"_id": 0, "html_content": 1, "encodings": 1})
+    if html_blog or not html_on_demand:
+        return html_blog
+    
+    summary = await db.summaries.find_one({"paper_id": paper_id}, {"_id": 0})
+    if not summary:
+        return None
+    paper = await db.papers.find_one({"id": paper_id}, {"_id": 0, "author": 1}) or {}
+    html_content = ai_summarizer.generate_html_blog(summary, {"author": paper.get('author') or 'Unknown Author'})
+    if html_persist:
+        return await store_html_blog(paper_id, html_content)
+    # Memory-only mode: the rendered responses live in response_cache alone
+    return {"html_content": html_content}
+
+async def mark_paper_failed(job: dict, error: str):
+    """Mark a paper as failed once its job has exhausted all retries"""
+    await progress_tracker.update(job['paper_id'], status=ProcessingStatus.FAILED, processing_progress=0)
+    publish_summary_event(job['paper_id'], "failed")
+
+# Durable job queue replacing BackgroundTasks: bounded workers, leases, retries
+job_queue = JobQueue(
+    db.jobs,
+    handler=process_paper_async,
+    on_failure=mark_paper_failed,
+    workers=int(os.environ.get('JOB_WORKERS', 16)),
+    max_depth=int(os.environ.get('JOB_MAX_QUEUE_DEPTH', 1000)),
+    max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 3)),
+    lease_seconds=int(os.environ.get('JOB_LEASE_SECONDS', 60)),
+    backoff_seconds=float(os.environ.get('JOB_RETRY_BACKOFF_SECONDS', 5)),
+    max_per_minute=int(os.environ.get('JOB_MAX_PER_MINUTE', 0))
+)
+
+async def reuse_processed_results(papers: List[Paper]) -> Set[str]:
+    """Attach the outputs of completed papers with the same content hash, returning the reused paper ids"""
+    hashes = list({paper.content_hash for paper in papers})
+    
+    # Newest completed paper per content hash, in one query for the whole upload
+    sources = {}
+    async for source in db.papers.aggregate([
+        # Fallback summaries came from a failed LLM call, so those papers are summarized again
+        {"$match": {"content_hash": {"$in": hashes}, "status": ProcessingStatus.COMPLETED, "fallback_summary": {"$ne": True}}},
+        {"$sort": {"upload_date": -1}},
+        {"$group": {
+            "_id": "$content_hash",
+            "id": {"$first": "$id"},
+            "original_title": {"$first": "$original_title"},
+            "author": {"$first": "$author"}
+        }}
+    ]):
+        sources[source['_id']] = source
+    if not sources:
+        return set()
+    
+    source_ids = [source['id'] for source in sources.values()]
+    summaries = {doc['paper_id']: doc async for doc in db.summaries.find({"paper_id": {"$in": source_ids}})}
+    html_blogs = {doc['paper_id']: doc async for doc in db.html_blogs.find({"paper_id": {"$in": source_ids}})}
+    
+    # Copy the existing documents under the new paper ids, no LLM call needed
+    reused, new_summaries, new_html_blogs = set(), [], []
+    for paper in papers:
+        source = sources.get(paper.content_hash)
+        summary = summaries.get(source['id']) if source else None
+        html_blog = html_blogs.get(source['id']) if source else None
+        if not summary or (not html_blog and not html_on_demand):
+            continue
+        
+        new_summaries.append(Summary(
+            paper_id=paper.id,
+            title=summary['title'],
+            introduction=summary['introduction'],
+            key_points=summary['key_points'],
+            conclusion=summary['conclusion'],
+            implications=summary['implications']
+        ).dict())
+        if html_blog:
+            new_html_blogs.append(HtmlBlog(
+                paper_id=paper.id,
+                html_content=html_blog['html_content'],
+                encodings=html_blog.get('encodings', {})
+            ).dict())
+        
+        paper.original_title = source.get('original_title')
+        paper.author = source.get('author')
+        paper.status = ProcessingStatus.COMPLETED
+        paper.processing_progress = 100
+        reused.add(paper.id)
+    
+    # New paper ids cannot collide, so plain bulk inserts are safe here
+    if new_summaries:
+        await db.summaries.insert_many(new_summaries)
+    if new_html_blogs:
+        await db.html_blogs.insert_many(new_html_blogs)
+    return reused
+
+StoredUpload = Tuple[str, str, Path, int]
+
+async def register_uploads(uploads: List[StoredUpload], batch_id: Optional[str] = None) -> List[Paper]:
+    """Create paper records for stored uploads (filename, hash, path, size) and queue them, in bulk"""
+    papers = [
+        Paper(
+            filename=filename,
+            file_size=file_size,
+            file_path=str(file_path),
+            content_hash=content_hash,
+            batch_id=batch_id
         )
+        for filename, content_hash, file_path, file_size in uploads
+    ]
+    if not papers:
+        return papers
+    
+    # Repeat uploads of an already processed PDF reuse its summary
+    reused = await reuse_processed_results(papers)
+    
+    # Store in database
+    await db.papers.insert_many([paper.dict() for paper in papers])
+    
+    # Queue for processing
+    await job_queue.enqueue_many([paper.id for paper in papers if paper.id not in reused])
+    
+    return papers
+
+async def register_upload(filename: str, content_hash: str, file_path: Path, file_size: int) -> Paper:
+    """Create the paper record for a stored upload and queue it for processing"""
+    papers = await register_uploads([(filename, content_hash, file_path, file_size)])
+    return papers[0]
+
+async def check_upload_allowed(filename: Optional[str], declared_size: Optional[int] = None):
+    """Reject uploads that can be refused before any bytes are written"""
+    # Validate file type
+    if not filename or not filename.lower().endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+    
+    # Validate declared size; the actual size is enforced while streaming
+    if declared_size and declared_size > max_upload_size:
+        raise HTTPException(status_code=400, detail=f"File size must be less than {max_upload_size // (1024 * 1024)}MB")
+    
+    # Reject new work instead of growing the backlog without bound
+    if await job_queue.is_full():
+        raise HTTPException(status_code=503, detail="Processing queue is full, please retry later")
 
 @api_router.post("/papers/upload", response_model=PaperResponse)
-async def upload_paper(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_paper(file: UploadFile = File(...)):
     """Upload and store PDF paper"""
     try:
-        # Validate file type
-        if not file.filename.lower().endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Only PDF files are allowed")
-        
-        # Validate file size (50MB limit)
-        if not file.size or file.size > 50 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File size must be less than 50MB")
-        
-        # Create paper record
-        paper = Paper(
-            filename=file.filename,
-            file_size=file.size,
-            file_path=""  # Will be set after saving file
-        )
+        await check_upload_allowed(file.filename, file.size)
         
-        # Save file to disk
-        file_path = upload_folder / f"{paper.id}_{file.filename}"
-        paper.file_path = str(file_path)
+        # Save file to disk, hashing it as it streams in
+        content_hash, file_path, file_size = await upload_store.save(file)
         
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        paper = await register_upload(file.filename, content_hash, file_path, file_size)
+        return PaperResponse(**paper.dict())
         
-        # Store in database
-        await db.papers.insert_one(paper.dict())
+    except HTTPException:
+        raise
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to upload file")
+
+@api_router.post("/papers/upload/stream", response_model=PaperResponse)
+async def upload_paper_stream(request: Request, filename: str):
+    """Upload a PDF sent as the raw request body, without multipart spooling"""
+    try:
+        declared_size = request.headers.get('content-length')
+        try:
+            declared_size = int(declared_size) if declared_size else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        await check_upload_allowed(filename, declared_size)
         
-        # Start background processing
-        background_tasks.add_task(process_paper_async, paper.id)
+        content_hash, file_path, file_size = await upload_store.save_stream(request.stream())
         
+        paper = await register_upload(filename, content_hash, file_path, file_size)
         return PaperResponse(**paper.dict())
         
     except HTTPException:
         raise
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to upload file")
 
-@api_router.get("/papers/{paper_id}/status", response_model=ProcessingStatusResponse)
-async def get_paper_status(paper_id: str):
-    """Get processing status of a paper"""
-    paper = await db.papers.find_one({"id": paper_id})
+def summarize_batch(batch_id: str, papers: List[Dict], rejected: List[BatchRejection] = None) -> BatchResponse:
+    """Aggregate the status of a batch, preferring in-process progress over the database"""
+    status_counts: Dict[str, int] = {}
+    total_progress = 0
+    responses = []
+    for paper in papers:
+        paper = {**paper, **(progress_tracker.get(paper['id']) or {})}
+        status = ProcessingStatus(paper['status'])
+        status_counts[status.value] = status_counts.get(status.value, 0) + 1
+        # Failed papers are finished too, so they count as done for overall progress
+        total_progress += 100 if status in TERMINAL_STATUSES else paper['processing_progress']
+        responses.append(PaperResponse(**paper))
+    
+    return BatchResponse(
+        batch_id=batch_id,
+        total=len(papers),
+        status_counts=status_counts,
+        progress=total_progress // len(papers) if papers else 0,
+        papers=responses,
+        rejected=rejected or []
+    )
+
+@api_router.post("/papers/batch", response_model=BatchResponse)
+async def upload_batch(files: List[UploadFile] = File(...)):
+    """Upload many PDFs, or zip archives of PDFs, as one batch with bulk database writes"""
+    if await job_queue.depth() + len(files) > job_queue.max_depth:
+        raise HTTPException(status_code=503, detail="Processing queue is full, please retry later")
+    
+    stored: List[StoredUpload] = []
+    rejected: List[BatchRejection] = []
+    
+    async def store(filename: str, save):
+        try:
+            stored.append((filename, *await save))
+        except UploadRejected as e:
+            rejected.append(BatchRejection(filename=filename, error=str(e)))
+        if len(stored) > batch_max_files:
+            raise HTTPException(status_code=400, detail=f"A batch may contain at most {batch_max_files} PDF files")
+    
+    try:
+        for file in files:
+            filename = file.filename or ""
+            if filename.lower().endswith(".zip"):
+                try:
+                    async for member_name, chunks in upload_store.iter_zip_pdfs(file.file):
+                        await store(member_name, upload_store.save_stream(chunks))
+                except UploadRejected as e:
+                    rejected.append(BatchRejection(filename=filename, error=str(e)))
+            elif filename.lower().endswith(".pdf"):
+                await store(filename, upload_store.save(file))
+            else:
+                rejected.append(BatchRejection(filename=filename, error="Only PDF and zip files are allowed"))
+        
+        if not stored:
+            raise HTTPException(status_code=400, detail="No valid PDF files in batch")
+        
+        batch_id = str(uuid.uuid4())
+        papers = await register_uploads(stored, batch_id=batch_id)
+        return summarize_batch(batch_id, [paper.dict() for paper in papers], rejected)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to upload batch")
+
+@api_router.get("/papers/batch/{batch_id}", response_model=BatchResponse)
+async def get_batch_status(batch_id: str):
+    """Aggregate progress of the papers uploaded in a batch"""
+    papers = await db.papers.find({"batch_id": batch_id}, PAPER_LIST_PROJECTION).to_list(None)
+    if not papers:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return summarize_batch(batch_id, papers)
+
+@api_router.post("/uploads", response_model=UploadSessionResponse)
+async def create_upload_session(session_request: UploadSessionCreate):
+    """Start a resumable upload for a large PDF"""
+    await check_upload_allowed(session_request.filename, session_request.file_size)
+    
+    session = UploadSession(filename=session_request.filename, file_size=session_request.file_size)
+    await db.upload_sessions.insert_one(session.dict())
+    
+    return UploadSessionResponse(upload_id=session.id, filename=session.filename, offset=0)
+
+@api_router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(upload_id: str):
+    """Get the current offset of a resumable upload"""
+    session = await db.upload_sessions.find_one({"id": upload_id})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    return UploadSessionResponse(
+        upload_id=upload_id,
+        filename=session['filename'],
+        offset=upload_store.part_size(upload_id)
+    )
+
+@api_router.put("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(upload_id: str, offset: int, request: Request):
+    """Append the raw request body to a resumable upload at the given offset"""
+    session = await db.upload_sessions.find_one({"id": upload_id})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    # Clients resume by asking for the current offset and sending from there;
+    # a second request writing to the same upload meanwhile is turned away
+    try:
+        new_offset = await upload_store.append_part(upload_id, offset, request.stream())
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return UploadSessionResponse(upload_id=upload_id, filename=session['filename'], offset=new_offset)
+
+@api_router.post("/uploads/{upload_id}/complete", response_model=PaperResponse)
+async def complete_upload(upload_id: str):
+    """Finish a resumable upload and queue the paper for processing"""
+    session = await db.upload_sessions.find_one({"id": upload_id})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    try:
+        content_hash, file_path, file_size = await upload_store.finalize_part(upload_id, session.get('file_size'))
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await db.upload_sessions.delete_one({"id": upload_id})
+    
+    paper = await register_upload(session['filename'], content_hash, file_path, file_size)
+    return PaperResponse(**paper.dict())
+
+@api_router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    """Abandon a resumable upload and delete its partial data"""
+    result = await db.upload_sessions.delete_one({"id": upload_id})
+    if not result.deleted_count:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    
+    await upload_store.discard_part(upload_id)
+    return {"message": "Upload aborted"}
+
+async def current_status(paper_id: str) -> Optional[ProcessingStatusResponse]:
+    """Current status of a paper, from memory when it is being processed here"""
+    paper = progress_tracker.get(paper_id)
     if not paper:
-        raise HTTPException(status_code=404, detail="Paper not found")
+        paper = await db.papers.find_one({"id": paper_id}, {"status": 1, "processing_progress": 1})
+    if not paper:
+        return None
     
     return ProcessingStatusResponse(
         status=paper['status'],
         progress=paper['processing_progress']
     )
 
-@api_router.get("/papers/{paper_id}/summary", response_model=SummaryResponse)
-async def get_paper_summary(paper_id: str):
-    """Get accessible summary for a paper"""
-    summary = await db.summaries.find_one({"paper_id": paper_id})
+async def status_updates(paper_id: str, keepalive: float = 15):
+    """Yield the current status and every change until a terminal state; None marks a keepalive"""
+    # Subscribe before reading the current state so no change is missed
+    with progress_broker.subscribe(paper_id) as queue:
+        status = await current_status(paper_id)
+        if not status:
+            return
+        yield status
+        
+        last = (status.status, status.progress)
+        while last[0] not in TERMINAL_STATUSES:
+            event = await progress_broker.next_event(queue, keepalive)
+            if event is None:
+                # Without the change stream, a paper processed by another worker only
+                # shows up in the database, so re-read it whenever the stream is idle
+                status = await current_status(paper_id)
+                if not status:
+                    return
+                if (status.status, status.progress) == last:
+                    yield None
+                    continue
+                event = status.dict()
+            # Events may arrive from both the tracker and the change stream
+            if (event['status'], event['progress']) == last:
+                continue
+            last = (event['status'], event['progress'])
+            yield ProcessingStatusResponse(**event)
+
+@api_router.get("/papers/{paper_id}/status", response_model=ProcessingStatusResponse)
+async def get_paper_status(paper_id: str):
+    """Get processing status of a paper"""
+    status = await current_status(paper_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    
+    return status
+
+@api_router.get("/papers/{paper_id}/events")
+async def stream_paper_events(paper_id: str):
+    """Stream status and progress changes as Server-Sent Events"""
+    if not await current_status(paper_id):
+        raise HTTPException(status_code=404, detail="Paper not found")
+    
+    async def event_stream():
+        async for status in status_updates(paper_id):
+            if status is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: status\ndata: {status.json()}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/papers/{paper_id}/ws")
+async def paper_events_websocket(websocket: WebSocket, paper_id: str):
+    """Stream status and progress changes over a WebSocket"""
+    await websocket.accept()
+    try:
+        if not await current_status(paper_id):
+            await websocket.close(code=4404, reason="Paper not found")
+            return
+        
+        async def send_updates():
+            async for status in status_updates(paper_id):
+                if status is not None:
+                    await websocket.send_text(status.json())
+        
+        async def wait_for_disconnect():
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        
+        # Nothing is sent while a paper waits in the queue, so only reading the socket
+        # notices a client that went away and releases its broker subscription
+        sender = asyncio.create_task(send_updates())
+        receiver = asyncio.create_task(wait_for_disconnect())
+        try:
+            done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sender, receiver):
+                task.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+        
+        # The paper reached a terminal state while the client was still connected
+        if sender in done and sender.exception() is None:
+            await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+async def load_summary_response(paper_id: str) -> CachedBody:
+    summary = await db.summaries.find_one({"paper_id": paper_id}, {"_id": 0})
     if not summary:
         raise HTTPException(status_code=404, detail="Summary not found")
+    body = SummaryResponse(**summary).json().encode()
+    encodings = await asyncio.to_thread(compress_variants, body)
+    return CachedBody(body, make_etag(body), "application/json", encodings=encodings)
+
+@api_router.get("/papers/{paper_id}/summary", response_model=SummaryResponse)
+async def get_paper_summary(paper_id: str, request: Request):
+    """Get accessible summary for a paper"""
+    entry = response_cache.get((paper_id, "summary_response"))
+    if entry is None:
+        entry = await load_summary_response(paper_id)
+        response_cache.put((paper_id, "summary_response"), entry)
+    return cached_response(request, entry)
+
+# Seconds between keepalives of an idle summary stream, which also re-checks the database
+SUMMARY_STREAM_KEEPALIVE = 15
+
+def sse_event(event: str, data=None) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@api_router.get("/papers/{paper_id}/summary/stream")
+async def stream_paper_summary(paper_id: str):
+    """Stream summary fields as Server-Sent Events as soon as the model produces them"""
+    status = await current_status(paper_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    
+    async def final_events(status: Optional[ProcessingStatusResponse]) -> Optional[List[str]]:
+        """Events that end the stream once the summary is stored or processing failed"""
+        summary = await db.summaries.find_one({"paper_id": paper_id})
+        if summary:
+            return [sse_event(field, value) for field, value in summary_events(summary)] + [sse_event("done")]
+        if not status or status.status == ProcessingStatus.FAILED:
+            return [sse_event("failed")]
+        return None
+    
+    async def event_stream():
+        with progress_broker.subscribe(summary_channel(paper_id)) as queue:
+            # Snapshot before any await so replayed and queued events never overlap
+            replay = list(summary_partials.get(paper_id, []))
+            
+            events = await final_events(status)
+            if events:
+                for event in events:
+                    yield event
+                return
+            
+            for event in replay:
+                yield sse_event(event['event'], event['data'])
+            
+            while True:
+                event = await progress_broker.next_event(queue, SUMMARY_STREAM_KEEPALIVE)
+                if event is None:
+                    # A paper summarized by another worker only shows up in the database
+                    events = await final_events(await current_status(paper_id))
+                    if events:
+                        for event in events:
+                            yield event
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event(event['event'], event['data'])
+                if event['event'] in ("done", "failed"):
+                    return
     
-    return SummaryResponse(**summary)
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def load_html_response(paper_id: str) -> CachedBody:
+    html_blog = await load_html_blog(paper_id)
+    if not html_blog:
+        raise HTTPException(status_code=404, detail="HTML blog not found")
+    body = html_response_body(html_blog['html_content'])
+    # Blogs stored before precompression, or only kept in memory, are compressed here
+    encodings = html_blog.get('encodings') or await asyncio.to_thread(compress_variants, body)
+    return CachedBody(body, make_etag(body), "application/json", encodings=encodings)
 
 @api_router.get("/papers/{paper_id}/html")
-async def get_paper_html(paper_id: str):
+async def get_paper_html(paper_id: str, request: Request):
     """Get HTML blog post for a paper"""
-    html_blog = await db.html_blogs.find_one({"paper_id": paper_id})
+    entry = response_cache.get((paper_id, "html_response"))
+    if entry is None:
+        entry = await load_html_response(paper_id)
+        response_cache.put((paper_id, "html_response"), entry)
+    return cached_response(request, entry)
+
+def cached_response(request: Request, entry: CachedBody) -> Response:
+    """Serve a cached body in the best accepted encoding, or 304 when the client already holds it"""
+    encoding = choose_encoding(request.headers.get("accept-encoding"), entry.encodings or {})
+    # Each content coding is a distinct representation and needs its own strong ETag
+    etag = f'{entry.etag[:-1]}-{encoding}"' if encoding else entry.etag
+    headers = {"ETag": etag, "Cache-Control": result_cache_control}
+    if entry.encodings:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if entry.filename:
+        headers["Content-Disposition"] = f'attachment; filename="{entry.filename}"'
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(entry.encodings[encoding], media_type=entry.media_type, headers=headers)
+    return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+async def load_download(paper_id: str, format: str) -> CachedBody:
+    """Render a summary or HTML download from its stored document"""
+    if format == "summary":
+        summary = await db.summaries.find_one({"paper_id": paper_id}, {"_id": 0})
+        if not summary:
+            raise HTTPException(status_code=404, detail="Summary not found")
+        body = json.dumps(summary, indent=2, default=str).encode()
+        return CachedBody(body, make_etag(body), "application/json", "summary.json")
+    
+    html_blog = await load_html_blog(paper_id)
     if not html_blog:
         raise HTTPException(status_code=404, detail="HTML blog not found")
-    
-    return {"html_content": html_blog['html_content']}
+    body = html_blog['html_content'].encode()
+    return CachedBody(body, make_etag(body), "text/html; charset=utf-8", "blog-post.html")
 
 @api_router.get("/papers/{paper_id}/download/{format}")
-async def download_paper_content(paper_id: str, format: str):
+async def download_paper_content(paper_id: str, format: str, request: Request):
     """Download paper content in specified format"""
     if format == "original":
         paper = await db.papers.find_one({"id": paper_id})
         if not paper:
             raise HTTPException(status_code=404, detail="Paper not found")
         
+        # Uploads are stored by content hash, which makes it a strong validator
+        etag = f'"{paper["content_hash"]}"' if paper.get('content_hash') else None
+        if etag and etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
         file_path = Path(paper['file_path'])
         if not file_path.exists():
             raise HTTPException(status_code=404, detail="Original file not found")
         
-        return FileResponse(file_path, filename=paper['filename'])
-    
-    elif format == "summary":
-        summary = await db.summaries.find_one({"paper_id": paper_id})
-        if not summary:
-            raise HTTPException(status_code=404, detail="Summary not found")
-        
-        # Create temporary JSON file
-        import json
-        import tempfile
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as tmp:
-            json.dump(summary, tmp, indent=2, default=str)
-            tmp_path = tmp.name
-        
-        return FileResponse(tmp_path, filename="summary.json")
+        return FileResponse(file_path, filename=paper['filename'], headers={"ETag": etag} if etag else None)
     
-    elif format == "html":
-        html_blog = await db.html_blogs.find_one({"paper_id": paper_id})
-        if not html_blog:
-            raise HTTPException(status_code=404, detail="HTML blog not found")
-        
-        # Create temporary HTML file
-        import tempfile
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as tmp:
-            tmp.write(html_blog['html_content'])
-            tmp_path = tmp.name
-        
-        return FileResponse(tmp_path, filename="blog-post.html")
+    elif format in ("summary", "html"):
+        entry = response_cache.get((paper_id, format))
+        if entry is None:
+            entry = await load_download(paper_id, format)
+            response_cache.put((paper_id, format), entry)
+        return cached_response(request, entry)
     
     else:
         raise HTTPException(status_code=400, detail="Invalid format")
 
+# Only the fields PaperResponse needs; file paths never leave the database
+PAPER_LIST_PROJECTION = {"_id": 0, **{field: 1 for field in PaperResponse.__fields__}}
+
+def parse_paper_cursor(cursor: str):
+    """Split an '<upload_date>,<id>' cursor into its parts"""
+    try:
+        upload_date, paper_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(upload_date), paper_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @api_router.get("/papers", response_model=List[PaperResponse])
-async def list_papers():
-    """List all papers"""
-    papers = await db.papers.find().sort("upload_date", -1).to_list(100)
+async def list_papers(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    status: Optional[List[ProcessingStatus]] = Query(None)
+):
+    """List papers newest first, paginated with an '<upload_date>,<id>' cursor"""
+    query = {}
+    if status:
+        query["status"] = {"$in": status}
+    
+    # Keyset pagination: continue strictly after the last paper of the previous page
+    if after:
+        cursor_date, cursor_id = parse_paper_cursor(after)
+        query["$or"] = [
+            {"upload_date": {"$lt": cursor_date}},
+            {"upload_date": cursor_date, "id": {"$lt": cursor_id}}
+        ]
+    
+    papers = await db.papers.find(query, PAPER_LIST_PROJECTION) \
+        .sort([("upload_date", -1), ("id", -1)]) \
+        .limit(limit) \
+        .to_list(limit)
+    
+    if len(papers) == limit:
+        last = papers[-1]
+        response.headers["X-Next-Cursor"] = f"{last['upload_date'].isoformat()},{last['id']}"
+    
     return [PaperResponse(**paper) for paper in papers]
 
+@api_router.get("/assets/blog.css")
+async def get_blog_css(request: Request):
+    """Stylesheet shared by all blog posts when BLOG_CSS_URL points here"""
+    headers = {"ETag": blog_renderer.css_etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag_matches(request.headers.get("if-none-match"), blog_renderer.css_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(blog_renderer.css, media_type="text/css", headers=headers)
+
+@api_router.get("/pipeline/stats")
+async def get_pipeline_stats():
+    """Per-stage queue depths, utilisation and latencies, for tuning the worker counts"""
+    return {"job_queue_depth": await job_queue.depth(), "stages": pipeline.stats()}
+
+@api_router.get("/admin/profile")
+async def profile_event_loop(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(5, ge=1),
+    all_threads: bool = False,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Sample stacks for a time window and return them folded, ready for flamegraph.pl or speedscope"""
+    # Stack dumps expose source paths and each profile holds a thread, so an admin token is required
+    if not diagnostics_enabled or not admin_token:
+        raise HTTPException(status_code=404, detail="Diagnostics are disabled")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if seconds > profiler.max_seconds:
+        raise HTTPException(status_code=400, detail=f"Profiles are limited to {profiler.max_seconds} seconds")
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    
+    folded = await profiler.profile(seconds, interval_ms / 1000, None if all_threads else loop_monitor.loop_thread_id)
+    return Response(folded, media_type="text/plain")
+
 # Health check endpoint
 @api_router.get("/")
 async def root():
     return {"message": "Academic Summarizer API is running"}
 
+@api_router.get("/health")
+async def health():
+    return {
+        "status": "ok" if index_builder.ready else "degraded",
+        "indexes": index_builder.status
+    }
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics; per-stage timings plus queue gauges sampled at scrape time"""
+    JOB_QUEUE_DEPTH.set(await job_queue.depth())
+    pipeline.update_gauges()
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Indexes build in the background so startup is not blocked on large collections
+index_builder = IndexBuilder(db)
+index_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def create_indexes():
+    global index_task
+    index_task = asyncio.create_task(index_builder.build())
+
+@app.on_event("startup")
+async def start_job_queue():
+    await pipeline.start()
+    await job_queue.start()
+
+@app.on_event("startup")
+async def start_diagnostics():
+    if diagnostics_enabled:
+        loop_monitor.start()
+
+# Multi-node deployments can relay progress written by other nodes
+change_stream_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_change_stream():
+    global change_stream_task
+    if os.environ.get('PROGRESS_CHANGE_STREAM', '').lower() in ('1', 'true', 'yes'):
+        change_stream_task = asyncio.create_task(progress_broker.watch_change_stream(db.papers))
+
+# Part files of abandoned resumable uploads are removed once their session has expired
+session_sweep_task: Optional[asyncio.Task] = None
+
+async def sweep_upload_sessions():
+    while True:
+        try:
+            removed = await upload_store.sweep_stale_parts()
+            if removed:
+                logger.info(f"Removed {removed} stale upload part files")
+        except Exception as e:
+            logger.error(f"Upload part sweep failed: {str(e)}")
+        await asyncio.sleep(3600)
+
+@app.on_event("startup")
+async def start_session_sweep():
+    global session_sweep_task
+    session_sweep_task = asyncio.create_task(sweep_upload_sessions())
+
+@app.on_event("shutdown")
+async def stop_session_sweep():
+    if session_sweep_task:
+        session_sweep_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_change_stream():
+    if change_stream_task:
+        change_stream_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_diagnostics():
+    if diagnostics_enabled:
+        await loop_monitor.stop()
+
+@app.on_event("shutdown")
+async def stop_index_build():
+    if index_task:
+        index_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+    await pipeline.stop()
+
+@app.on_event("shutdown")
+async def flush_progress():
+    await progress_tracker.flush_all()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.close()
+
+@app.on_event("shutdown")
+async def shutdown_pdf_executor():
+    pdf_processor.executor.shutdown(wait=False, cancel_futures=True)
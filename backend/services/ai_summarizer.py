@@ -1,31 +1,22 @@
-import os
 import json
 import asyncio
-from typing import Dict, List
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from models import KeyPoint
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from services.json_stream import SummaryStreamParser
+from services.llm_client import LlmClient
+from services.blog_renderer import BlogRenderer
+from services.prompt_builder import PREFIX_CHARS_PER_TOKEN, PromptBuilder, TokenCounter
+from services.metrics import REGISTRY
 
-class AISummarizer:
-    def __init__(self):
-        self.api_key = os.environ.get('EMERGENT_LLM_KEY', 'sk-emergent-6Fe62898991Ec31C79')
-    
-    async def create_accessible_summary(self, paper_data: Dict[str, str]) -> Dict:
-        """Create an accessible summary from academic paper data"""
-        
-        # Prepare the prompt for AI summarization
-        prompt = f"""
-        You are an expert at making academic research accessible to general audiences. 
-        Transform this academic paper into an engaging, easy-to-understand summary.
-
-        PAPER DETAILS:
-        Title: {paper_data.get('title', 'Academic Paper')}
-        Author: {paper_data.get('author', 'Unknown Author')}
-        Abstract: {paper_data.get('abstract', '')}
-        Introduction: {paper_data.get('introduction', '')}
-        Conclusion: {paper_data.get('conclusion', '')}
+SUMMARY_SECONDS = REGISTRY.histogram("summary_seconds", "Time to create the accessible summary of a paper")
+FALLBACK_SUMMARIES = REGISTRY.counter("summary_fallbacks_total", "Summaries replaced by the generic fallback after an AI failure")
+HTML_RENDER_SECONDS = REGISTRY.histogram("html_render_seconds", "Time to render a blog post")
 
-        FULL TEXT (excerpt): {paper_data.get('full_text', '')[:3000]}
+# Receives (field, value) pairs as summary fields become available
+PartialCallback = Callable[[str, Any], Awaitable[None]]
 
+SUMMARY_INSTRUCTIONS = """
         Please create:
         1. An engaging title that makes the research accessible
         2. A compelling introduction paragraph that hooks the reader
@@ -34,50 +25,213 @@ class AISummarizer:
         5. 3-4 practical implications or takeaways
 
         Format your response as JSON with this exact structure:
-        {{
+        {
             "title": "Engaging accessible title",
             "introduction": "Hook paragraph in simple language",
             "key_points": [
-                {{"heading": "Point 1 Title", "content": "Explanation in simple terms"}},
-                {{"heading": "Point 2 Title", "content": "Explanation in simple terms"}},
-                {{"heading": "Point 3 Title", "content": "Explanation in simple terms"}},
-                {{"heading": "Point 4 Title", "content": "Explanation in simple terms"}}
+                {"heading": "Point 1 Title", "content": "Explanation in simple terms"},
+                {"heading": "Point 2 Title", "content": "Explanation in simple terms"},
+                {"heading": "Point 3 Title", "content": "Explanation in simple terms"},
+                {"heading": "Point 4 Title", "content": "Explanation in simple terms"}
             ],
             "conclusion": "Clear concluding paragraph",
             "implications": ["Implication 1", "Implication 2", "Implication 3"]
-        }}
+        }
 
         Use conversational language, avoid jargon, and make it engaging for non-experts.
         """
 
+# Sections are fitted to the token budget by PromptBuilder; {body_label} and {instructions} are fixed
+SUMMARY_PROMPT = """
+        You are an expert at making academic research accessible to general audiences. 
+        Transform this academic paper into an engaging, easy-to-understand summary.
+
+        PAPER DETAILS:
+        Title: {title}
+        Author: {author}
+        Abstract: {abstract}
+        Introduction: {introduction}
+        Conclusion: {conclusion}
+
+        {body_label}{body}
+{instructions}"""
+
+# Map notes are asked to be at most 8 short bullets; longer ones are cut to this size
+MAX_NOTE_TOKENS = 400
+
+SYSTEM_MESSAGE = "You are an expert academic communication specialist who excels at making complex research accessible to general audiences."
+
+class AISummarizer:
+    def __init__(self, llm_client: LlmClient, streaming: bool = False, map_reduce: bool = False, chunk_tokens: int = 3000, map_concurrency: int = 4, prompt_tokens: int = 4000, blog_renderer: Optional[BlogRenderer] = None, token_counter: Optional[TokenCounter] = None):
+        # One long-lived client with pooled connections and a shared rate limit, owned by the caller
+        self.llm_client = llm_client
+        # Stream tokens so partial summaries can be delivered before the response completes
+        self.streaming = streaming
+        # Map-reduce mode summarizes every chunk of the full text instead of an excerpt
+        self.map_reduce = map_reduce
+        self.chunk_tokens = max(500, chunk_tokens)
+        self.map_concurrency = max(1, map_concurrency)
+        # Paper sections are fitted to a fixed prompt budget counted with the model's tokenizer
+        self.token_counter = token_counter or TokenCounter(self.llm_client.model)
+        self.prompt_builder = PromptBuilder(self.token_counter, prompt_tokens)
+        # Blog template compiled once and reused for every paper
+        self.blog_renderer = blog_renderer or BlogRenderer()
+    
+    def _build_prompt(self, paper_data: Dict[str, str], section_notes: Optional[List[str]] = None) -> str:
+        """Build the summarization prompt for a parsed paper
+
+        Sections are cut to fit the prompt token budget, highest priority first.
+        With section_notes (map-reduce mode) the notes covering the whole paper
+        replace the full-text excerpt. Every note cost an LLM call, so the notes
+        are never dropped: the budget is raised by their size instead.
+        """
+        sections = {
+            "title": paper_data.get('title', 'Academic Paper'),
+            "author": paper_data.get('author', 'Unknown Author'),
+            "abstract": paper_data.get('abstract', ''),
+            "introduction": paper_data.get('introduction', ''),
+            "conclusion": paper_data.get('conclusion', ''),
+            "body": paper_data.get('full_text', '')
+        }
+        
+        if section_notes:
+            notes = "\n\n".join(
+                f"Part {i + 1}:\n{self.token_counter.truncate(note, MAX_NOTE_TOKENS)[0]}"
+                for i, note in enumerate(section_notes)
+            )
+            del sections["body"]
+            return self.prompt_builder.build(
+                SUMMARY_PROMPT,
+                sections,
+                budget_tokens=self.prompt_builder.budget_tokens + self.token_counter.count(notes),
+                body_label="NOTES ON THE FULL PAPER, SECTION BY SECTION:\n",
+                body=notes,
+                instructions=SUMMARY_INSTRUCTIONS
+            )
+        
+        return self.prompt_builder.build(SUMMARY_PROMPT, sections, body_label="FULL TEXT (excerpt): ", instructions=SUMMARY_INSTRUCTIONS)
+
+    def _build_map_prompt(self, paper_data: Dict[str, str], chunk: str, index: int, total: int) -> str:
+        """Build the prompt summarizing one chunk of the full text"""
+        return f"""
+        You are reading part {index + 1} of {total} of the academic paper "{paper_data.get('title', 'Academic Paper')}".
+        Write concise notes on this part: the questions it addresses, methods, key findings
+        and any important numbers. Use at most 8 short bullet points and plain text only.
+
+        TEXT:
+        {chunk}
+        """
+
+    def _split_chunks(self, text: str) -> List[str]:
+        """Split text into chunks of at most chunk_tokens tokens, preferring paragraph breaks"""
+        # Only a window of the text is tokenized per chunk, never the whole remainder
+        window = self.chunk_tokens * PREFIX_CHARS_PER_TOKEN
+        chunks = []
+        start = 0
+        
+        while start < len(text):
+            piece, _ = self.token_counter.truncate(text[start:start + window], self.chunk_tokens)
+            end = start + len(piece) if piece else min(start + window, len(text))
+            if end < len(text):
+                # Break at the last paragraph or sentence boundary in the second half of the chunk
+                boundary = max(text.rfind("\n", start + len(piece) // 2, end), text.rfind(". ", start + len(piece) // 2, end))
+                if boundary > start:
+                    end = boundary + 1
+            chunk = text[start:end].strip()
+            if chunk:
+                chunks.append(chunk)
+            start = end
+        
+        return chunks
+
+    async def _map_chunks(self, paper_data: Dict[str, str], chunks: List[str], session_id: str) -> List[str]:
+        """Summarize chunks concurrently, bounded by map_concurrency"""
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+        
+        async def summarize_chunk(index: int, chunk: str) -> str:
+            async with semaphore:
+                try:
+                    prompt = self._build_map_prompt(paper_data, chunk, index, len(chunks))
+                    return (await self.llm_client.complete(prompt, f"{session_id}-part-{index + 1}")).strip()
+                except Exception as e:
+                    # A missing part degrades the summary but should not fail it
+                    print(f"AI chunk summarization error (part {index + 1}): {str(e)}")
+                    return ""
+        
+        notes = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+        return [note for note in notes if note]
+
+    def _parse_summary(self, response: str) -> Dict:
+        """Parse the JSON summary from a model response; raises json.JSONDecodeError"""
+        # Remove markdown code blocks if present
+        response_text = response.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text[7:]  # Remove ```json
+        if response_text.endswith('```'):
+            response_text = response_text[:-3]  # Remove ```
+        response_text = response_text.strip()
+        
+        return json.loads(response_text)
+
+    async def _stream_summary(self, prompt: str, on_partial: PartialCallback) -> str:
+        """Stream the model response, reporting each summary field as soon as it completes"""
+        parser = SummaryStreamParser()
+        parts = []
+        
+        async for delta in self.llm_client.stream(prompt):
+            parts.append(delta)
+            for field, value in parser.feed(delta):
+                await on_partial(field, value)
+        
+        return "".join(parts)
+
+    async def create_accessible_summary(
+        self,
+        paper_data: Dict[str, str],
+        on_partial: Optional[PartialCallback] = None,
+        session_id: Optional[str] = None
+    ) -> Dict:
+        """Create an accessible summary from academic paper data
+
+        When on_partial is given, it is awaited with (field, value) for each
+        summary field as soon as it is available, e.g. ("key_point", {...}).
+        session_id isolates the LLM conversation, typically one per paper.
+        """
+        session_id = session_id or f"summary-{uuid.uuid4()}"
+        with SUMMARY_SECONDS.time():
+            return await self._create_summary(paper_data, on_partial, session_id)
+
+    async def _create_summary(self, paper_data: Dict[str, str], on_partial: Optional[PartialCallback], session_id: str) -> Dict:
         try:
-            # Initialize LlmChat with the API key and system message
-            llm_chat = LlmChat(
-                api_key=self.api_key,
-                session_id="summarizer_session",
-                system_message="You are an expert academic communication specialist who excels at making complex research accessible to general audiences."
-            ).with_model("openai", "gpt-4o")
+            # Prepare the prompt for AI summarization
+            section_notes = None
+            if self.map_reduce:
+                chunks = self._split_chunks(paper_data.get('full_text', ''))
+                # Short papers fit in a single prompt without a map step
+                if len(chunks) > 1:
+                    section_notes = await self._map_chunks(paper_data, chunks, session_id)
+            prompt = self._build_prompt(paper_data, section_notes)
             
-            # Create user message
-            user_message = UserMessage(text=prompt)
+            response = None
+            if on_partial and self.streaming:
+                try:
+                    response = await self._stream_summary(prompt, on_partial)
+                except Exception as e:
+                    print(f"AI streaming error, retrying without streaming: {str(e)}")
+                    await on_partial("reset", None)
             
-            # Send the message and get response
-            response = await llm_chat.send_message(user_message)
+            if response is None:
+                response = await self.llm_client.complete(prompt, session_id)
+                if on_partial:
+                    for field, value in SummaryStreamParser().feed(response):
+                        await on_partial(field, value)
             
             # Try to parse JSON response
             try:
-                # Remove markdown code blocks if present
-                response_text = response.strip()
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:]  # Remove ```json
-                if response_text.endswith('```'):
-                    response_text = response_text[:-3]  # Remove ```
-                response_text = response_text.strip()
-                
-                summary_data = json.loads(response_text)
-                return summary_data
+                return self._parse_summary(response)
             except json.JSONDecodeError:
-                # If JSON parsing fails, return a fallback summary
+                # If JSON parsing fails, return a fallback summary and let a retry ask again
+                await self.llm_client.forget(prompt)
                 return self._create_fallback_summary(paper_data)
                 
         except Exception as e:
@@ -88,6 +242,7 @@ class AISummarizer:
 
     def _create_fallback_summary(self, paper_data: Dict[str, str]) -> Dict:
         """Create a basic fallback summary if AI processing fails"""
+        FALLBACK_SUMMARIES.inc()
         title = paper_data.get('title', 'Academic Research Summary')
         
         return {
@@ -105,157 +260,11 @@ class AISummarizer:
                 "Provides practical insights for practitioners", 
                 "Opens new avenues for future research",
                 "Contributes to evidence-based decision making"
-            ]
+            ],
+            "fallback": True
         }
 
     def generate_html_blog(self, summary_data: Dict, paper_data: Dict[str, str]) -> str:
         """Generate a complete HTML blog post from summary data"""
-        
-        title = summary_data.get('title', 'Academic Research Summary')
-        author = paper_data.get('author', 'Unknown Author')
-        
-        # Generate key points HTML
-        key_points_html = ""
-        for point in summary_data.get('key_points', []):
-            key_points_html += f"""
-        <div class="section">
-            <h2>{point.get('heading', 'Key Point')}</h2>
-            <p>{point.get('content', 'Content not available')}</p>
-        </div>
-"""
-
-        # Generate implications HTML
-        implications_html = ""
-        for implication in summary_data.get('implications', []):
-            implications_html += f'                <li>{implication}</li>\n'
-
-        html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        body {{
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-            line-height: 1.6;
-            color: #2d3748;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 2rem;
-            background-color: #f7fafc;
-        }}
-        .header {{
-            text-align: center;
-            margin-bottom: 3rem;
-            padding: 2rem;
-            background: linear-gradient(135deg, #10b981 0%, #059669 100%);
-            color: white;
-            border-radius: 12px;
-        }}
-        .header h1 {{
-            font-size: 2.5rem;
-            margin-bottom: 1rem;
-            font-weight: 700;
-        }}
-        .meta {{
-            opacity: 0.9;
-            font-size: 0.9rem;
-        }}
-        .content {{
-            background: white;
-            padding: 2.5rem;
-            border-radius: 12px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-            margin-bottom: 2rem;
-        }}
-        .intro {{
-            font-size: 1.2rem;
-            font-style: italic;
-            color: #4a5568;
-            margin-bottom: 2rem;
-            padding: 1.5rem;
-            background: #edf2f7;
-            border-left: 4px solid #10b981;
-            border-radius: 0 8px 8px 0;
-        }}
-        .section {{
-            margin-bottom: 2.5rem;
-        }}
-        .section h2 {{
-            color: #2d3748;
-            font-size: 1.5rem;
-            margin-bottom: 1rem;
-            border-bottom: 2px solid #e2e8f0;
-            padding-bottom: 0.5rem;
-        }}
-        .section p {{
-            margin-bottom: 1rem;
-            font-size: 1.1rem;
-        }}
-        .implications {{
-            background: #f0fff4;
-            border: 1px solid #9ae6b4;
-            padding: 1.5rem;
-            border-radius: 8px;
-            margin-top: 2rem;
-        }}
-        .implications h3 {{
-            color: #22543d;
-            margin-bottom: 1rem;
-        }}
-        .implications ul {{
-            list-style-type: none;
-            padding: 0;
-        }}
-        .implications li {{
-            padding: 0.5rem 0;
-            border-bottom: 1px solid #c6f6d5;
-        }}
-        .implications li:before {{
-            content: "✓ ";
-            color: #38a169;
-            font-weight: bold;
-            margin-right: 0.5rem;
-        }}
-        .footer {{
-            text-align: center;
-            margin-top: 3rem;
-            padding: 2rem;
-            background: #2d3748;
-            color: white;
-            border-radius: 12px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>{title}</h1>
-        <div class="meta">
-            <p>Based on research by {author}</p>
-            <p>Published: {paper_data.get('upload_date', 'Recent')} | Reading time: 6-8 minutes</p>
-        </div>
-    </div>
-
-    <div class="content">
-        <div class="intro">
-            {summary_data.get('introduction', 'This research provides valuable insights into important academic concepts.')}
-        </div>
-
-{key_points_html}
-
-        <div class="implications">
-            <h3>Key Implications and Takeaways</h3>
-            <ul>
-{implications_html}
-            </ul>
-        </div>
-    </div>
-
-    <div class="footer">
-        <p><strong>Conclusion:</strong> {summary_data.get('conclusion', 'This research contributes valuable knowledge to the field and opens new avenues for understanding.')}</p>
-    </div>
-</body>
-</html>"""
-
-        return html_template
\ No newline at end of file
+        with HTML_RENDER_SECONDS.time():
+            return self.blog_renderer.render(summary_data, paper_data)
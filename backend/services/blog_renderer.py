@@ -0,0 +1,55 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Optional
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+TEMPLATES_DIR = Path(__file__).parent.parent / 'templates'
+
+def minify_css(css: str) -> str:
+    """Drop the whitespace that only serves readability"""
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,])\s*", r"\1", css).replace(";}", "}").strip()
+
+class BlogRenderer:
+    """Renders HTML blog posts from a template compiled once, escaping all model output
+
+    With a css_url the stylesheet is linked instead of inlined, so every post
+    shares one cacheable asset and stores only its own markup.
+    """
+
+    def __init__(self, css_url: Optional[str] = None, templates_dir: Path = TEMPLATES_DIR):
+        environment = Environment(
+            loader=FileSystemLoader(str(templates_dir)),
+            autoescape=select_autoescape(["html"]),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False
+        )
+        self.template = environment.get_template("blog_post.html")
+        self.css = minify_css((templates_dir / "blog.css").read_text(encoding="utf-8"))
+        css_hash = hashlib.sha256(self.css.encode()).hexdigest()[:32]
+        self.css_etag = f'"{css_hash}"'
+        # Versioned so the asset can be cached forever and still change on deploy
+        self.css_url = f"{css_url}?v={css_hash[:12]}" if css_url else None
+
+    def render(self, summary_data: Dict, paper_data: Dict[str, str]) -> str:
+        """Render the blog post for a summary"""
+        return self.template.render(
+            css_url=self.css_url,
+            css=Markup(self.css),
+            title=summary_data.get('title', 'Academic Research Summary'),
+            author=paper_data.get('author', 'Unknown Author'),
+            upload_date=paper_data.get('upload_date', 'Recent'),
+            introduction=summary_data.get('introduction', 'This research provides valuable insights into important academic concepts.'),
+            key_points=[
+                {
+                    "heading": point.get('heading', 'Key Point'),
+                    "content": point.get('content', 'Content not available')
+                }
+                for point in summary_data.get('key_points', [])
+            ],
+            implications=summary_data.get('implications', []),
+            conclusion=summary_data.get('conclusion', 'This research contributes valuable knowledge to the field and opens new avenues for understanding.')
+        )
@@ -0,0 +1,75 @@
+import logging
+from typing import Dict, List, Tuple
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from services.upload_store import SESSION_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# (collection, keys, options) for every lookup and sort path used by the API
+INDEXES: List[Tuple[str, List[Tuple[str, int]], Dict]] = [
+    ("papers", [("id", 1)], {"unique": True}),
+    ("papers", [("upload_date", -1), ("id", -1)], {}),
+    ("papers", [("status", 1), ("upload_date", -1), ("id", -1)], {}),
+    ("papers", [("content_hash", 1), ("status", 1)], {}),
+    ("papers", [("batch_id", 1)], {}),
+    ("summaries", [("paper_id", 1)], {"unique": True}),
+    ("html_blogs", [("paper_id", 1)], {"unique": True}),
+    ("llm_cache", [("expires_at", 1)], {"expireAfterSeconds": 0}),
+    ("llm_cache", [("last_used", 1)], {}),
+    ("upload_sessions", [("id", 1)], {"unique": True}),
+    # Abandoned resumable uploads expire; their part files are swept separately
+    ("upload_sessions", [("created_date", 1)], {"expireAfterSeconds": SESSION_TTL_SECONDS}),
+]
+
+# Generated documents that can safely be deduplicated before adding a unique index
+DERIVED_COLLECTIONS = {"summaries", "html_blogs"}
+
+def index_name(collection: str, keys: List[Tuple[str, int]]) -> str:
+    return collection + "." + "_".join(f"{field}_{direction}" for field, direction in keys)
+
+class IndexBuilder:
+    """Creates the indexes at startup and keeps their build status for health checks"""
+
+    def __init__(self, db):
+        self.db = db
+        self.status: Dict[str, str] = {index_name(c, keys): "pending" for c, keys, _ in INDEXES}
+
+    @property
+    def ready(self) -> bool:
+        return all(state == "ready" for state in self.status.values())
+
+    async def build(self):
+        """Create every index; failures are logged and reported so the API still starts"""
+        for collection, keys, options in INDEXES:
+            name = index_name(collection, keys)
+            self.status[name] = "building"
+            try:
+                await self._create(collection, keys, options)
+                self.status[name] = "ready"
+            except Exception as e:
+                logger.error(f"Failed to create index {name}: {str(e)}")
+                self.status[name] = f"failed: {str(e)}"
+
+    async def _create(self, collection: str, keys: List[Tuple[str, int]], options: Dict):
+        try:
+            await self.db[collection].create_index(keys, **options)
+        except (DuplicateKeyError, OperationFailure) as e:
+            # Reprocessed papers used to leave several summaries behind
+            if e.code != 11000 or collection not in DERIVED_COLLECTIONS:
+                raise
+            removed = await self._remove_duplicates(collection, keys[0][0])
+            logger.warning(f"Removed {removed} duplicate documents from {collection}")
+            await self.db[collection].create_index(keys, **options)
+
+    async def _remove_duplicates(self, collection: str, field: str) -> int:
+        """Keep only the newest document for each value of a field"""
+        removed = 0
+        pipeline = [
+            {"$sort": {"created_date": -1}},
+            {"$group": {"_id": f"${field}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ]
+        async for group in self.db[collection].aggregate(pipeline, allowDiskUse=True):
+            result = await self.db[collection].delete_many({"_id": {"$in": group['ids'][1:]}})
+            removed += result.deleted_count
+        return removed
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Optional
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a scheduled wake-up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+LOOP_BLOCKED = REGISTRY.counter("event_loop_blocked_total", "Times a callback blocked the event loop past the slow callback threshold")
+
+def fold_stack(frame) -> str:
+    """Stack as 'outer;...;inner' frames, the folded format read by flamegraph.pl and speedscope"""
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+class LoopMonitor:
+    """Measures event loop lag and logs the stack of callbacks that block the loop
+
+    A task on the loop records a heartbeat every interval. A watchdog thread
+    notices when the heartbeat is overdue by more than the slow callback
+    threshold and logs the loop thread's stack while it is still blocked, so
+    the log shows the code responsible rather than the code that ran after it.
+    """
+
+    def __init__(self, interval: float = 0.1, slow_callback: float = 0.1):
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start monitoring the running loop; call from a coroutine on that loop"""
+        self.loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure_lag())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._watchdog:
+            self._watchdog.join()
+
+    async def _measure_lag(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._heartbeat = time.monotonic()
+            LOOP_LAG_SECONDS.observe(max(0.0, self._heartbeat - started - self.interval))
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(min(self.interval, self.slow_callback) / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat - self.interval
+            # Log each stall once, however long it lasts
+            if blocked < self.slow_callback or heartbeat == reported:
+                continue
+            reported = heartbeat
+            LOOP_BLOCKED.inc()
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable"
+            logger.warning(f"Event loop blocked for over {blocked * 1000:.0f} ms in:\n{stack}")
+
+class SamplingProfiler:
+    """Samples thread stacks over a time window and returns them folded for a flamegraph
+
+    Samples are taken from a separate thread, so time the loop spends blocked
+    in synchronous code shows up as well as time spent awaiting.
+    """
+
+    def __init__(self, max_seconds: float = 60):
+        self.max_seconds = max_seconds
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, interval: float, thread_id: Optional[int] = None) -> str:
+        """Profile one thread, or every thread when thread_id is None; one profile runs at a time"""
+        async with self._lock:
+            stacks = await asyncio.to_thread(self._sample, min(seconds, self.max_seconds), interval, thread_id)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    @staticmethod
+    def _sample(seconds: float, interval: float, thread_id: Optional[int]) -> Counter:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_id or (thread_id is not None and ident != thread_id):
+                    continue
+                stack = fold_stack(frame)
+                stacks[stack if thread_id is not None else f"{names.get(ident, ident)};{stack}"] += 1
+            time.sleep(interval)
+        return stacks
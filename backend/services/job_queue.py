@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from pymongo import ReturnDocument
+from models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """Durable paper-processing queue stored in Mongo with leases and a bounded worker pool"""
+
+    def __init__(
+        self,
+        collection,
+        handler: Callable[[str], Awaitable[None]],
+        on_failure: Optional[Callable[[Dict, str], Awaitable[None]]] = None,
+        workers: int = 4,
+        max_depth: int = 1000,
+        max_attempts: int = 3,
+        lease_seconds: int = 60,
+        backoff_seconds: float = 5,
+        max_per_minute: int = 0,
+        poll_interval: float = 1.0
+    ):
+        self.collection = collection
+        self.handler = handler
+        self.on_failure = on_failure
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.poll_interval = poll_interval
+        # Minimum delay between job starts across all workers (0 disables pacing)
+        self.start_interval = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup = asyncio.Event()
+        self._pace_lock = asyncio.Lock()
+        self._next_start = 0.0
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Start the worker pool; expired leases from a previous run are reclaimed by the workers"""
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index([("status", 1), ("run_after", 1)])
+        await self.collection.create_index([("status", 1), ("lease_expires", 1)])
+        self._tasks = [asyncio.create_task(self._worker_loop()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Stop the workers; running jobs are picked up again once their lease expires"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def depth(self) -> int:
+        """Number of jobs waiting to run"""
+        return await self.collection.count_documents({"status": JobStatus.QUEUED})
+
+    async def is_full(self) -> bool:
+        return await self.depth() >= self.max_depth
+
+    async def enqueue(self, paper_id: str) -> Job:
+        """Persist a new job for a paper and wake an idle worker"""
+        job = Job(paper_id=paper_id)
+        await self.collection.insert_one(job.dict())
+        self._wakeup.set()
+        return job
+
+    async def enqueue_many(self, paper_ids: List[str]) -> List[Job]:
+        """Persist jobs for many papers in a single write"""
+        jobs = [Job(paper_id=paper_id) for paper_id in paper_ids]
+        if jobs:
+            await self.collection.insert_many([job.dict() for job in jobs])
+            self._wakeup.set()
+        return jobs
+
+    async def _claim(self) -> Optional[Dict]:
+        """Atomically lease the next runnable or orphaned job"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": JobStatus.QUEUED, "run_after": {"$lte": now}},
+                {"status": JobStatus.RUNNING, "lease_expires": {"$lt": now}}
+            ]},
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING,
+                    "locked_by": self.worker_id,
+                    "lease_expires": now + timedelta(seconds=self.lease_seconds),
+                    "updated_date": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _pace(self):
+        """Space job starts so bursts drain at the configured rate"""
+        if not self.start_interval:
+            return
+        async with self._pace_lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_start - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = loop.time() + self.start_interval
+
+    async def _renew_lease(self, job_id: str):
+        """Extend the lease while the handler is running"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await self.collection.update_one(
+                    {"id": job_id, "locked_by": self.worker_id},
+                    {"$set": {"lease_expires": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                # A lost heartbeat would let another worker claim the running job, so
+                # keep renewing; the lease outlasts a couple of missed renewals
+                logger.warning(f"Failed to renew lease of job {job_id}: {str(e)}")
+
+    async def _idle(self):
+        """Sleep until a job is enqueued or the poll interval elapses"""
+        self._wakeup.clear()
+        # asyncio.wait rather than wait_for, which can swallow a cancellation that
+        # races with the event being set and leave the worker unstoppable
+        waiter = asyncio.ensure_future(self._wakeup.wait())
+        try:
+            await asyncio.wait({waiter}, timeout=self.poll_interval)
+        finally:
+            waiter.cancel()
+
+    async def _worker_loop(self):
+        while True:
+            try:
+                await self._pace()
+                job = await self._claim()
+                if not job:
+                    await self._idle()
+                    continue
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _run(self, job: Dict):
+        heartbeat = asyncio.create_task(self._renew_lease(job['id']))
+        try:
+            await self.handler(job['paper_id'])
+        except Exception as e:
+            await self._record_failure(job, str(e))
+        else:
+            await self.collection.update_one(
+                {"id": job['id'], "locked_by": self.worker_id},
+                {"$set": {"status": JobStatus.SUCCEEDED, "lease_expires": None, "updated_date": datetime.utcnow()}}
+            )
+        finally:
+            heartbeat.cancel()
+
+    async def _record_failure(self, job: Dict, error: str):
+        """Reschedule with exponential backoff, or give up after max_attempts"""
+        now = datetime.utcnow()
+        if job['attempts'] < self.max_attempts:
+            delay = self.backoff_seconds * (2 ** (job['attempts'] - 1))
+            logger.warning(f"Job {job['id']} failed (attempt {job['attempts']}), retrying in {delay}s: {error}")
+            await self.collection.update_one(
+                {"id": job['id'], "locked_by": self.worker_id},
+                {"$set": {
+                    "status": JobStatus.QUEUED,
+                    "run_after": now + timedelta(seconds=delay),
+                    "lease_expires": None,
+                    "last_error": error,
+                    "updated_date": now
+                }}
+            )
+            return
+
+        logger.error(f"Job {job['id']} failed permanently after {job['attempts']} attempts: {error}")
+        await self.collection.update_one(
+            {"id": job['id'], "locked_by": self.worker_id},
+            {"$set": {"status": JobStatus.FAILED, "lease_expires": None, "last_error": error, "updated_date": now}}
+        )
+        if self.on_failure:
+            await self.on_failure(job, error)
@@ -0,0 +1,101 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+# Event names for the items of top-level arrays in the summary schema
+ITEM_EVENTS = {"key_points": "key_point", "implications": "implication"}
+
+class SummaryStreamParser:
+    """Incremental parser emitting summary fields as soon as each one is complete
+
+    Text is fed as it arrives from the model. Top-level string values are
+    emitted as (key, value) and each element of a top-level array as
+    (item_event, element), e.g. ("key_point", {"heading": ..., "content": ...}).
+    Anything before the opening brace, such as a markdown code fence, is skipped.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._containers: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key = None
+        self._item_start = 0
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume more model output and return the fields completed by it"""
+        events = []
+        self._text += chunk
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            char = text[i]
+            depth = len(self._containers)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(text[self._string_start:i + 1], events)
+                continue
+
+            if depth == 0:
+                # Skip code fences or prose until the summary object starts
+                if char == "{":
+                    self._containers.append("{")
+                    self._expect_key = True
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in "{[":
+                self._containers.append(char)
+                if len(self._containers) == 3:
+                    self._item_start = i
+            elif char in "}]":
+                if depth == 3 and self._containers[1] == "[":
+                    self._emit_item(text[self._item_start:i + 1], events)
+                self._containers.pop()
+                if not self._containers:
+                    self.done = True
+            elif depth == 1 and char == ":":
+                self._expect_key = False
+            elif depth == 1 and char == ",":
+                self._expect_key = True
+
+        self._pos = len(text)
+        return events
+
+    def _close_string(self, literal: str, events: List[Tuple[str, Any]]):
+        depth = len(self._containers)
+        if depth == 1:
+            if self._expect_key:
+                self._key = json.loads(literal)
+            else:
+                events.append((self._key, json.loads(literal)))
+        elif depth == 2 and self._containers[1] == "[":
+            self._emit_item(literal, events)
+
+    def _emit_item(self, literal: str, events: List[Tuple[str, Any]]):
+        try:
+            value = json.loads(literal)
+        except json.JSONDecodeError:
+            return
+        events.append((ITEM_EVENTS.get(self._key, f"{self._key}_item"), value))
+
+def summary_events(summary: Dict) -> List[Tuple[str, Any]]:
+    """Split a complete summary into the same events the parser emits"""
+    events = [("title", summary['title']), ("introduction", summary['introduction'])]
+    events += [("key_point", point) for point in summary['key_points']]
+    events.append(("conclusion", summary['conclusion']))
+    events += [("implication", implication) for implication in summary['implications']]
+    return events
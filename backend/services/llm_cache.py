@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_LOOKUPS = REGISTRY.counter("llm_cache_lookups_total", "LLM response cache lookups by result", ["result"])
+LLM_CACHE_EVICTIONS = REGISTRY.counter("llm_cache_evictions_total", "LLM responses evicted to keep the cache under its size limit")
+
+def cache_key(provider: str, model: str, system_message: str, prompt: str) -> str:
+    """Hash of everything that determines the response; whitespace in the prompt is normalized"""
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(json.dumps([provider, model, system_message, normalized]).encode()).hexdigest()
+
+class LlmResponseCache:
+    """Persistent LLM responses in Mongo, so identical prompts are only paid for once
+
+    Entries expire after ttl_seconds through a TTL index, and the least
+    recently used ones are evicted beyond max_entries. With bypass set,
+    lookups always miss but fresh responses are still stored. Cache errors
+    are logged and treated as misses so they never fail an LLM call.
+    """
+
+    def __init__(self, collection, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 10000, bypass: bool = False):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bypass = bypass
+
+    async def get(self, key: str) -> Optional[str]:
+        if self.bypass:
+            LLM_CACHE_LOOKUPS.inc(result="bypass")
+            return None
+        now = datetime.utcnow()
+        try:
+            # The TTL monitor runs about once a minute, so check expiry here as well
+            entry = await self.collection.find_one_and_update(
+                {"_id": key, "expires_at": {"$gt": now}},
+                {"$set": {"last_used": now}},
+                projection={"response": 1}
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+            entry = None
+        LLM_CACHE_LOOKUPS.inc(result="hit" if entry else "miss")
+        return entry['response'] if entry else None
+
+    async def put(self, key: str, response: str, model: str):
+        now = datetime.utcnow()
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {
+                    "response": response,
+                    "model": model,
+                    "created_at": now,
+                    "last_used": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds)
+                },
+                upsert=True
+            )
+            await self._evict()
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {str(e)}")
+
+    async def invalidate(self, key: str):
+        """Drop a response the caller could not use, so the next call asks the model again"""
+        try:
+            await self.collection.delete_one({"_id": key})
+        except Exception as e:
+            logger.warning(f"LLM cache invalidation failed: {str(e)}")
+
+    async def _evict(self):
+        # The estimate comes from collection metadata, so checking it on every write is cheap
+        excess = await self.collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+        # Evict a little more than needed so the next writes do not each evict again
+        excess += max(1, self.max_entries // 100)
+        oldest = await self.collection.find({}, {"_id": 1}).sort("last_used", 1).limit(excess).to_list(excess)
+        result = await self.collection.delete_many({"_id": {"$in": [entry['_id'] for entry in oldest]}})
+        LLM_CACHE_EVICTIONS.inc(result.deleted_count)
@@ -0,0 +1,220 @@
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Optional
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+from services.llm_cache import LlmResponseCache, cache_key
+from services.metrics import REGISTRY
+
+LLM_SECONDS = REGISTRY.histogram("llm_request_seconds", "Latency of LLM calls, excluding rate-limit waits", ["mode"])
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram("llm_first_token_seconds", "Time until a streamed LLM response starts")
+LLM_ERRORS = REGISTRY.counter("llm_errors_total", "LLM calls that raised", ["mode"])
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "Estimated tokens sent to and received from the LLM", ["direction"])
+LLM_RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram("llm_rate_limit_wait_seconds", "Time LLM calls waited for the rate limiter")
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for rate limiting (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+class _Bucket:
+    """Token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: int, burst_seconds: float):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        # Requests larger than the bucket only wait for a full bucket...
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        # ...but are charged in full; the debt leaves the level negative and later callers wait it off
+        self.level -= amount
+
+class RateLimiter:
+    """Smooths LLM calls to a requests-per-minute and tokens-per-minute budget"""
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0, burst_seconds: float = 10):
+        self._requests = _Bucket(requests_per_minute, burst_seconds) if requests_per_minute > 0 else None
+        self._tokens = _Bucket(tokens_per_minute, burst_seconds) if tokens_per_minute > 0 else None
+        # Waiters are served in order so a burst drains at the configured rate
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        """Wait until one request using about `tokens` tokens fits in the budget"""
+        if not self._requests and not self._tokens:
+            return
+        async with self._lock:
+            while True:
+                wait = max(
+                    self._requests.wait_time(1) if self._requests else 0.0,
+                    self._tokens.wait_time(tokens) if self._tokens else 0.0
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(tokens)
+
+class LlmClient:
+    """Long-lived LLM client shared by all summarization calls
+
+    LlmChat keeps the conversation history of its session, so every call gets
+    a fresh chat with a caller-supplied session id (one per paper) while the
+    underlying HTTP connections are pooled and kept alive across calls.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        system_message: str,
+        provider: str = "openai",
+        model: str = "gpt-4o",
+        api_base: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_connections: int = 20,
+        expected_output_tokens: int = 1000,
+        chat_factory: Callable[..., LlmChat] = LlmChat,
+        response_cache: Optional[LlmResponseCache] = None
+    ):
+        self.api_key = api_key
+        self.system_message = system_message
+        self.provider = provider
+        self.model = model
+        self.api_base = api_base
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_connections = max_connections
+        self.expected_output_tokens = expected_output_tokens
+        self.chat_factory = chat_factory
+        # Responses to identical prompts are reused instead of paid for again
+        self.response_cache = response_cache
+        self._http_client = None
+
+    def _ensure_http_pool(self):
+        """Install a shared keep-alive HTTP client for litellm, which LlmChat calls into"""
+        if self._http_client is not None:
+            return
+        try:
+            import httpx
+            import litellm
+        except ImportError:
+            return
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        )
+        litellm.aclient_session = self._http_client
+
+    async def _acquire(self, prompt: str):
+        prompt_tokens = estimate_tokens(prompt)
+        with LLM_RATE_LIMIT_WAIT_SECONDS.time():
+            await self.rate_limiter.acquire(prompt_tokens + self.expected_output_tokens)
+        LLM_TOKENS.inc(prompt_tokens, direction="prompt")
+
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        return cache_key(self.provider, self.model, self.system_message, prompt)
+
+    async def forget(self, prompt: str):
+        """Drop the cached response to a prompt, e.g. one that could not be parsed"""
+        key = self._cache_key(prompt)
+        if key:
+            await self.response_cache.invalidate(key)
+
+    async def complete(self, prompt: str, session_id: str) -> str:
+        """Send a prompt in its own session and return the complete response"""
+        key = self._cache_key(prompt)
+        if key:
+            cached = await self.response_cache.get(key)
+            if cached is not None:
+                return cached
+
+        self._ensure_http_pool()
+        await self._acquire(prompt)
+
+        llm_chat = self.chat_factory(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=self.system_message
+        ).with_model(self.provider, self.model)
+
+        started = time.perf_counter()
+        try:
+            response = await llm_chat.send_message(UserMessage(text=prompt))
+        except Exception:
+            LLM_ERRORS.inc(mode="complete")
+            raise
+        LLM_SECONDS.observe(time.perf_counter() - started, mode="complete")
+        LLM_TOKENS.inc(estimate_tokens(response), direction="completion")
+        if key:
+            await self.response_cache.put(key, response, self.model)
+        return response
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the response to a prompt as text deltas"""
+        # LlmChat only returns complete responses, so streaming goes through litellm
+        import litellm
+
+        if not self.api_base:
+            raise RuntimeError("Streaming needs an api_base that accepts the LLM key")
+
+        key = self._cache_key(prompt)
+        if key:
+            cached = await self.response_cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        self._ensure_http_pool()
+        await self._acquire(prompt)
+
+        started = time.perf_counter()
+        first_token = True
+        parts = []
+        try:
+            response = await litellm.acompletion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                api_key=self.api_key,
+                api_base=self.api_base,
+                stream=True
+            )
+            async for chunk in response:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if first_token:
+                        LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started)
+                        first_token = False
+                    parts.append(delta)
+                    yield delta
+        except Exception:
+            LLM_ERRORS.inc(mode="stream")
+            raise
+        LLM_SECONDS.observe(time.perf_counter() - started, mode="stream")
+        response = "".join(parts)
+        LLM_TOKENS.inc(estimate_tokens(response), direction="completion")
+        if key:
+            await self.response_cache.put(key, response, self.model)
+
+    async def close(self):
+        """Close the pooled HTTP connections"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
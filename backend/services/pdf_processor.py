@@ -1,35 +1,229 @@
 import PyPDF2
 import io
+import logging
+import mmap
 import re
-from typing import Dict, Optional, List
+import time
+import asyncio
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, List, Tuple, Union
+from services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_SECONDS = REGISTRY.histogram("pdf_extract_seconds", "Time to extract the text of a PDF")
+PAGES_EXTRACTED = REGISTRY.counter("pdf_pages_extracted_total", "PDF pages whose text was extracted")
+PAGES_PER_SECOND = REGISTRY.histogram(
+    "pdf_extract_pages_per_second",
+    "Extraction throughput of each PDF",
+    buckets=(1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+PARSE_SECONDS = REGISTRY.histogram("paper_parse_seconds", "Time to parse the structure of a paper's text")
+POOL_RESTARTS = REGISTRY.counter("pdf_pool_restarts_total", "Process pools replaced after a worker died")
+
+# Canonical kinds for well-known section names
+SECTION_KINDS = {
+    'abstract': 'abstract',
+    'summary': 'abstract',
+    'keywords': 'keywords',
+    'key words': 'keywords',
+    'introduction': 'introduction',
+    'conclusion': 'conclusion',
+    'conclusions': 'conclusion',
+    'concluding remarks': 'conclusion',
+    'discussion': 'discussion',
+    'references': 'references',
+    'bibliography': 'references',
+}
+
+# A heading starts a line: an optional section number followed by a well-known
+# name (the rest of the line may already be section text), or a numbered title
+# filling the line. Wrapped sentences often start with a number too ("12 Hospitals
+# adopted ..."), so a title needs a dotted number ("2.", "2.1") and no trailing
+# period, or else must be a few words without punctuation ("3 Results"). Every
+# quantifier is bounded, so one finditer pass over the text is linear in its length.
+HEADING_PATTERN = re.compile(
+    r'^[ \t]{0,8}(?:'
+    r'(?:(?P<number>\d{1,2}(?:\.\d{1,2}){0,3})\.?[ \t]{1,4})?'
+    r'(?P<name>(?i:abstract|summary|key ?words|introduction|conclusions?|concluding remarks|discussion|references|bibliography))'
+    r'[ \t]{0,4}(?:[:.\u2014-]|$)'
+    r'|'
+    r'(?=\d{1,2}\.)(?P<title_number>\d{1,2}(?:\.\d{1,2}){0,3})\.?[ \t]{1,4}[A-Z][^\n]{0,80}(?<![.,;:])$'
+    r'|'
+    r'(?P<short_number>\d{1,2})[ \t]{1,4}[A-Z][^\s.,;:]{0,30}(?:[ \t]{1,4}[^\s.,;:]{1,30}){0,4}[ \t]{0,4}$'
+    r')',
+    re.MULTILINE
+)
+
+AUTHOR_PATTERNS = [
+    re.compile(r'by\s+(?:(?:Dr|Prof)\.?\s+)?([A-Z][a-z]+\s+[A-Z][a-z]+)', re.IGNORECASE),
+    re.compile(r'^\s*([A-Z][a-z]+\s+[A-Z][a-z]+)\s*$', re.MULTILINE),
+    re.compile(r'Author[s]?:\s*([^\n]+)', re.IGNORECASE)
+]
+
+class Section(NamedTuple):
+    """A section located by offsets into the original text"""
+    kind: str
+    number: Optional[str]
+    heading_start: int
+    start: int
+    end: int
+
+def index_sections(text: str) -> List[Section]:
+    """Find every section heading in one linear scan and return offsets, without copying the text"""
+    matches = list(HEADING_PATTERN.finditer(text))
+    sections = []
+    
+    for i, match in enumerate(matches):
+        name = match.group('name')
+        kind = SECTION_KINDS[' '.join(name.lower().split())] if name else 'section'
+        number = match.group('number') or match.group('title_number') or match.group('short_number')
+        # Named headings may carry text on the same line; titled headings fill it
+        start = match.end() if name else min(match.end() + 1, len(text))
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append(Section(kind, number, match.start(), start, end))
+    
+    return sections
+
+def _first_section(sections: List[Section], kind: str) -> Optional[Section]:
+    return next((section for section in sections if section.kind == kind), None)
+
+def _section_text(text: str, section: Optional[Section], limit: Optional[int] = None) -> str:
+    """Whitespace-normalized body of a section, optionally truncated"""
+    if section is None:
+        return ''
+    end = section.end if limit is None else min(section.end, section.start + limit * 2)
+    body = ' '.join(text[section.start:end].split())
+    return body if limit is None else body[:limit]
+
+def iter_page_texts(file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """Lazily yield the text of pages [start, end) of a PDF on disk
+
+    The file is memory-mapped rather than read into a bytes object, so only
+    the parts PyPDF2 touches are paged in and no copy of the file is made.
+    """
+    with open(file_path, 'rb') as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+        pdf_reader = PyPDF2.PdfReader(pdf_map)
+        pages = pdf_reader.pages
+        for i in range(start, len(pages) if end is None else min(end, len(pages))):
+            yield pages[i].extract_text()
+
+def _count_pages(file_path: str) -> int:
+    """Return the number of pages in a PDF file"""
+    with open(file_path, 'rb') as pdf_file, mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ) as pdf_map:
+        return len(PyPDF2.PdfReader(pdf_map).pages)
+
+def _extract_page_range(file_path: str, start: int, end: int) -> str:
+    """Extract text from pages [start, end) of a PDF file (runs in a worker process)"""
+    return "\n".join(iter_page_texts(file_path, start, end))
+
+def _parse_paper(text: str) -> Tuple[Dict[str, str], float]:
+    # Timed here because metrics recorded inside a worker process never reach the server
+    started = time.perf_counter()
+    paper_data = PDFProcessor().parse_academic_paper(text)
+    return paper_data, time.perf_counter() - started
+
+def _record_extraction(pages: int, seconds: float):
+    EXTRACT_SECONDS.observe(seconds)
+    PAGES_EXTRACTED.inc(pages)
+    if seconds > 0:
+        PAGES_PER_SECOND.observe(pages / seconds)
 
 class PDFProcessor:
-    def __init__(self):
-        pass
+    def __init__(self, executor: Optional[Executor] = None, pages_per_task: int = 25, executor_factory: Optional[Callable[[], Executor]] = None):
+        # Executor used for extraction; None falls back to the loop's default thread pool.
+        # With executor_factory, a process pool broken by a dead worker is replaced.
+        self.executor_factory = executor_factory
+        self.executor = executor if executor is not None or executor_factory is None else executor_factory()
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor_lock = asyncio.Lock()
+    
+    async def _run(self, func, *args):
+        """Run func in the executor, retrying once on a fresh pool if a worker died"""
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            if self.executor_factory is None:
+                raise
+            await self._replace_executor(executor)
+            # A document that kills the worker again fails on its own; the next one gets a new pool
+            return await loop.run_in_executor(self.executor, func, *args)
+    
+    async def _replace_executor(self, broken: Executor):
+        async with self._executor_lock:
+            # Concurrent calls that hit the same broken pool replace it only once
+            if self.executor is not broken:
+                return
+            logger.warning("PDF worker process died, replacing the process pool")
+            POOL_RESTARTS.inc()
+            self.executor = self.executor_factory()
+            broken.shutdown(wait=False, cancel_futures=True)
     
     def extract_text_from_pdf(self, pdf_content: bytes) -> str:
         """Extract all text content from PDF"""
+        started = time.perf_counter()
         try:
             pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_content))
-            text = ""
             
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            # Join once instead of growing a string page by page
+            text = "\n".join(page.extract_text() for page in pdf_reader.pages).strip()
+            _record_extraction(len(pdf_reader.pages), time.perf_counter() - started)
+            return text
+        except Exception as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    
+    def extract_text_from_path(self, file_path: str) -> str:
+        """Extract all text content from a PDF on disk without loading the file into memory"""
+        try:
+            return "\n".join(iter_page_texts(file_path)).strip()
+        except Exception as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    
+    async def extract_text_from_file(self, file_path: str) -> str:
+        """Extract text from a PDF on disk in the executor, splitting large documents into page ranges"""
+        started = time.perf_counter()
+        try:
+            page_count = await self._run(_count_pages, file_path)
             
-            return text.strip()
+            # Each range is handled by a separate worker and stitched back in page order
+            ranges = [
+                (start, min(start + self.pages_per_task, page_count))
+                for start in range(0, page_count, self.pages_per_task)
+            ]
+            parts = await asyncio.gather(*(
+                self._run(_extract_page_range, file_path, start, end)
+                for start, end in ranges
+            ))
+            
+            _record_extraction(page_count, time.perf_counter() - started)
+            return "\n".join(parts).strip()
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
     
-    def parse_academic_paper(self, text: str) -> Dict[str, str]:
-        """Parse academic paper structure to extract key components"""
+    async def parse_academic_paper_async(self, text: str) -> Dict[str, str]:
+        """Parse a paper in the executor so large texts never hold the event loop"""
+        paper_data, seconds = await self._run(_parse_paper, text)
+        PARSE_SECONDS.observe(seconds)
+        return paper_data
+    
+    def parse_academic_paper(self, text: Union[str, Iterable[str]], sections: Optional[List[Section]] = None) -> Dict[str, str]:
+        """Parse academic paper structure to extract key components
+
+        Accepts the full text or a stream of page texts such as iter_page_texts().
+        """
+        if not isinstance(text, str):
+            text = "\n".join(text).strip()
+        
         try:
-            # Clean the text
-            text = re.sub(r'\s+', ' ', text)
+            if sections is None:
+                sections = index_sections(text)
             
             # Extract title (usually first significant line)
-            lines = text.split('\n')
             title = None
-            for line in lines[:10]:  # Check first 10 lines
+            for line in text[:2000].split('\n')[:10]:  # Check first 10 lines
                 line = line.strip()
                 if len(line) > 10 and not line.isupper():
                     title = line
@@ -37,45 +231,27 @@ class PDFProcessor:
             
             # Extract author (look for common patterns)
             author = None
-            author_patterns = [
-                r'by\s+([A-Z][a-z]+\s+[A-Z][a-z]+)',
-                r'([A-Z][a-z]+\s+[A-Z][a-z]+)\s*\n',
-                r'Author[s]?:\s*([^\n]+)'
-            ]
-            
-            for pattern in author_patterns:
-                match = re.search(pattern, text[:1000], re.IGNORECASE)
+            head = text[:1000]
+            for pattern in AUTHOR_PATTERNS:
+                match = pattern.search(head)
                 if match:
                     author = match.group(1).strip()
                     break
             
-            # Extract abstract
-            abstract_match = re.search(
-                r'(?:abstract|summary)[\s:]*(.+?)(?:\n\s*\n|\n(?:1\.|introduction|keywords))',
-                text, re.IGNORECASE | re.DOTALL
-            )
-            abstract = abstract_match.group(1).strip() if abstract_match else None
-            
-            # Extract introduction
-            intro_match = re.search(
-                r'(?:introduction|1\.\s*introduction)[\s:]*(.+?)(?:\n\s*\n|\n(?:2\.|method|literature))',
-                text, re.IGNORECASE | re.DOTALL
-            )
-            introduction = intro_match.group(1).strip() if intro_match else None
-            
-            # Extract conclusion
-            conclusion_match = re.search(
-                r'(?:conclusion|discussion)[\s:]*(.+?)(?:\n\s*\n|references|\Z)',
-                text, re.IGNORECASE | re.DOTALL
+            # Section bodies are sliced from the original text by offset
+            abstract = _section_text(text, _first_section(sections, 'abstract'))
+            introduction = _section_text(text, _first_section(sections, 'introduction'))
+            conclusion = _section_text(
+                text,
+                _first_section(sections, 'conclusion') or _first_section(sections, 'discussion')
             )
-            conclusion = conclusion_match.group(1).strip() if conclusion_match else None
             
             return {
                 'title': title or 'Academic Paper',
                 'author': author or 'Unknown Author',
-                'abstract': abstract or '',
-                'introduction': introduction or '',
-                'conclusion': conclusion or '',
+                'abstract': abstract,
+                'introduction': introduction,
+                'conclusion': conclusion,
                 'full_text': text
             }
             
@@ -90,20 +266,22 @@ class PDFProcessor:
                 'full_text': text
             }
     
-    def get_key_sections(self, text: str) -> List[str]:
-        """Extract key sections from the paper"""
-        sections = []
+    def get_key_sections(self, text: str, sections: Optional[List[Section]] = None) -> List[str]:
+        """Extract key sections from the paper, reusing a section index when given"""
+        if sections is None:
+            sections = index_sections(text)
         
-        # Look for numbered sections
-        section_matches = re.finditer(
-            r'(\d+\.?\s*[A-Z][^.]*?)\.?\s*\n(.+?)(?=\n\d+\.|\Z)',
-            text, re.DOTALL
-        )
+        key_sections = []
         
-        for match in list(section_matches)[:5]:  # Limit to first 5 sections
-            section_title = match.group(1).strip()
-            section_content = match.group(2).strip()[:500]  # Limit content length
+        # Look for numbered sections
+        for section in sections:
+            if section.number is None:
+                continue
+            section_title = ' '.join(text[section.heading_start:section.start].split())
+            section_content = _section_text(text, section, 500)  # Limit content length
             if len(section_content) > 50:
-                sections.append(f"{section_title}: {section_content}")
+                key_sections.append(f"{section_title}: {section_content}")
+            if len(key_sections) == 5:  # Limit to first 5 sections
+                break
         
-        return sections
\ No newline at end of file
+        return key_sections
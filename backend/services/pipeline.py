@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+from services.metrics import REGISTRY
+
+STAGE_SECONDS = REGISTRY.histogram("pipeline_stage_seconds", "Time an item spent running in a pipeline stage", ["stage"])
+STAGE_WAIT_SECONDS = REGISTRY.histogram("pipeline_stage_wait_seconds", "Time an item waited in a stage's queue", ["stage"])
+STAGE_QUEUE_DEPTH = REGISTRY.gauge("pipeline_stage_queue_depth", "Items waiting in a stage's queue", ["stage"])
+STAGE_BUSY = REGISTRY.gauge("pipeline_stage_busy_workers", "Workers of a stage currently running an item", ["stage"])
+
+StageHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# (context, result future, time the item entered the queue)
+_Item = Tuple[Dict[str, Any], asyncio.Future, float]
+
+def _percentile(samples: Deque[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class Stage:
+    """One pipeline step with its own worker count and bounded input queue"""
+
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1, queue_size: int = 32, window: int = 256):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue: "asyncio.Queue[_Item]" = asyncio.Queue(maxsize=max(1, queue_size))
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        # Recent time spent waiting in the queue and running, in seconds
+        self.waits: Deque[float] = deque(maxlen=window)
+        self.runs: Deque[float] = deque(maxlen=window)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "processed": self.processed,
+            "failed": self.failed,
+            "wait_ms_p50": round(_percentile(self.waits, 0.5) * 1000, 1),
+            "wait_ms_p95": round(_percentile(self.waits, 0.95) * 1000, 1),
+            "run_ms_p50": round(_percentile(self.runs, 0.5) * 1000, 1),
+            "run_ms_p95": round(_percentile(self.runs, 0.95) * 1000, 1)
+        }
+
+class Pipeline:
+    """Runs items through a chain of stages connected by bounded queues
+
+    Every stage processes different items concurrently, so CPU-bound and
+    network-bound steps overlap across papers. A full queue blocks the stage
+    feeding it, which propagates backpressure up to submit().
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            self._tasks += [
+                asyncio.create_task(self._worker_loop(stage, next_stage))
+                for _ in range(stage.workers)
+            ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a context through every stage and return the final one; waits while the first queue is full"""
+        future = asyncio.get_running_loop().create_future()
+        await self.stages[0].queue.put((context, future, time.monotonic()))
+        return await future
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depths, utilisation and recent latencies of every stage"""
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def update_gauges(self):
+        """Refresh the queue depth and utilisation gauges, e.g. before a metrics scrape"""
+        for stage in self.stages:
+            STAGE_QUEUE_DEPTH.set(stage.queue.qsize(), stage=stage.name)
+            STAGE_BUSY.set(stage.busy, stage=stage.name)
+
+    async def _worker_loop(self, stage: Stage, next_stage: Optional[Stage]):
+        while True:
+            context, future, queued_at = await stage.queue.get()
+            try:
+                # The submitter gave up, e.g. its job was cancelled on shutdown
+                if future.done():
+                    continue
+                await self._run(stage, next_stage, context, future, queued_at)
+            finally:
+                stage.queue.task_done()
+
+    async def _run(self, stage: Stage, next_stage: Optional[Stage], context: Dict[str, Any], future: asyncio.Future, queued_at: float):
+        started = time.monotonic()
+        stage.waits.append(started - queued_at)
+        STAGE_WAIT_SECONDS.observe(started - queued_at, stage=stage.name)
+        stage.busy += 1
+        try:
+            result = await stage.handler(context)
+        except asyncio.CancelledError:
+            if not future.done():
+                future.cancel()
+            raise
+        except Exception as e:
+            stage.failed += 1
+            if not future.done():
+                future.set_exception(e)
+            return
+        finally:
+            stage.busy -= 1
+            stage.runs.append(time.monotonic() - started)
+            STAGE_SECONDS.observe(stage.runs[-1], stage=stage.name)
+
+        stage.processed += 1
+        if next_stage is None:
+            if not future.done():
+                future.set_result(result)
+        else:
+            await next_stage.queue.put((result, future, time.monotonic()))
@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class ProgressBroker:
+    """In-process pub/sub of paper status events for push endpoints"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def has_subscribers(self, paper_id: str) -> bool:
+        return bool(self._subscribers.get(paper_id))
+
+    def publish(self, paper_id: str, event: Dict):
+        """Deliver an event to every subscriber of a paper without blocking the publisher"""
+        for queue in self._subscribers.get(paper_id, ()):
+            # Slow consumers lose the oldest events; only the latest state matters
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, paper_id: str) -> Iterator[asyncio.Queue]:
+        """Register a queue receiving the events of a paper for the duration of the block"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[paper_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[paper_id].discard(queue)
+            if not self._subscribers[paper_id]:
+                del self._subscribers[paper_id]
+
+    @staticmethod
+    async def next_event(queue: asyncio.Queue, timeout: float) -> Optional[Dict]:
+        """Wait for the next event, returning None when the timeout elapses"""
+        getter = asyncio.ensure_future(queue.get())
+        try:
+            done, _ = await asyncio.wait({getter}, timeout=timeout)
+        finally:
+            getter.cancel()
+        return getter.result() if done else None
+
+    async def watch_change_stream(self, collection):
+        """Republish paper updates made by other nodes (requires a Mongo replica set)"""
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace"]}}}]
+        while True:
+            try:
+                async with collection.watch(pipeline, full_document="updateLookup") as stream:
+                    async for change in stream:
+                        paper = change.get("fullDocument")
+                        if paper and self.has_subscribers(paper['id']):
+                            self.publish(paper['id'], {
+                                "status": paper['status'],
+                                "progress": paper['processing_progress']
+                            })
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Paper change stream error: {str(e)}")
+                await asyncio.sleep(5)
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+from models import ProcessingStatus
+from services.progress_events import ProgressBroker
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {ProcessingStatus.COMPLETED, ProcessingStatus.FAILED}
+
+class ProgressTracker:
+    """In-process view of paper progress that coalesces changes into batched Mongo writes"""
+
+    def __init__(self, collection, flush_interval_ms: int = 1000, broker: Optional[ProgressBroker] = None):
+        self.collection = collection
+        self.broker = broker
+        self.flush_interval = flush_interval_ms / 1000
+        self._states: Dict[str, Dict] = {}
+        self._pending: Dict[str, Dict] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        # Motor runs every write on its own thread, so writes of one paper are serialized
+        # here; otherwise a late progress write could land after the terminal status
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def get(self, paper_id: str) -> Optional[Dict]:
+        """Latest known fields of a paper processed by this process, if any"""
+        return self._states.get(paper_id)
+
+    async def update(self, paper_id: str, **fields):
+        """Record new paper fields; terminal statuses are written immediately"""
+        state = self._states.setdefault(paper_id, {})
+        state.update(fields)
+        self._pending.setdefault(paper_id, {}).update(fields)
+
+        # Push the change to live subscribers before it reaches the database
+        if self.broker and 'status' in state:
+            self.broker.publish(paper_id, {
+                "status": state['status'],
+                "progress": state.get('processing_progress', 0)
+            })
+
+        if fields.get('status') in TERMINAL_STATUSES:
+            await self.finish(paper_id)
+        elif paper_id not in self._flush_tasks:
+            self._flush_tasks[paper_id] = asyncio.create_task(self._delayed_flush(paper_id))
+
+    async def _delayed_flush(self, paper_id: str):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_tasks.pop(paper_id, None)
+        try:
+            await self.flush(paper_id)
+        except Exception as e:
+            logger.error(f"Failed to flush progress for paper {paper_id}: {str(e)}")
+
+    async def flush(self, paper_id: str):
+        """Write all pending fields of a paper in a single update, after any write already in flight"""
+        lock = self._locks.setdefault(paper_id, asyncio.Lock())
+        async with lock:
+            pending = self._pending.pop(paper_id, None)
+            if pending:
+                await self.collection.update_one({"id": paper_id}, {"$set": pending})
+
+    async def finish(self, paper_id: str):
+        """Flush a paper and stop serving it from memory"""
+        # Only a flush still waiting out its interval is cancelled; one already writing
+        # holds the paper's lock, so the final flush below waits for it
+        task = self._flush_tasks.pop(paper_id, None)
+        if task:
+            task.cancel()
+        try:
+            await self.flush(paper_id)
+        finally:
+            self._states.pop(paper_id, None)
+            lock = self._locks.get(paper_id)
+            if lock and not lock.locked():
+                del self._locks[paper_id]
+
+    async def flush_all(self):
+        """Write everything still pending, e.g. on shutdown"""
+        for paper_id in list(self._pending):
+            await self.finish(paper_id)
@@ -0,0 +1,121 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from services.llm_client import estimate_tokens
+from services.metrics import REGISTRY
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+TOKEN_COUNT_CACHE = REGISTRY.counter("token_count_cache_total", "Token count lookups by cache result", ["result"])
+
+# Characters tokenized per token of allowance when truncating; English prose averages about 4
+PREFIX_CHARS_PER_TOKEN = 8
+
+# Prompt sections in priority order with the most tokens each may take before lower
+# priority sections get their share; None takes whatever is left
+SECTION_BUDGETS: List[Tuple[str, Optional[int]]] = [
+    ("title", 100),
+    ("author", 50),
+    ("abstract", 500),
+    ("introduction", 700),
+    ("conclusion", 500),
+    ("body", None),
+]
+
+class TokenCounter:
+    """Counts tokens with the model's tokenizer, caching counts by content hash
+
+    Falls back to the rough 4-characters-per-token estimate when tiktoken or
+    its encoding files are not available.
+    """
+
+    def __init__(self, model: str = "gpt-4o", cache_size: int = 4096):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except Exception as e:
+                # Unknown model, or the encoding could not be downloaded
+                logger.warning(f"Tokenizer for {model} unavailable, estimating token counts: {str(e)}")
+        self.cache_size = cache_size
+        self._counts: "OrderedDict[bytes, int]" = OrderedDict()
+
+    def count(self, text: str) -> int:
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        tokens = self._counts.get(key)
+        if tokens is not None:
+            self._counts.move_to_end(key)
+            TOKEN_COUNT_CACHE.inc(result="hit")
+            return tokens
+        TOKEN_COUNT_CACHE.inc(result="miss")
+        tokens = len(self.encoding.encode(text, disallowed_special=())) if self.encoding else estimate_tokens(text)
+        self._counts[key] = tokens
+        if len(self._counts) > self.cache_size:
+            self._counts.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int) -> Tuple[str, int]:
+        """Longest start of text within max_tokens, cut at a word boundary, and its token count"""
+        if max_tokens <= 0 or not text:
+            return "", 0
+        # Only a prefix is tokenized, so a long full text costs no more than its excerpt
+        prefix = text[:max_tokens * PREFIX_CHARS_PER_TOKEN]
+        tokens = self.count(prefix)
+        if tokens <= max_tokens:
+            return prefix, tokens
+
+        if self.encoding:
+            cut = self.encoding.decode(self.encoding.encode(prefix, disallowed_special=())[:max_tokens])
+        else:
+            cut = prefix[:(max_tokens - 1) * 4]
+        boundary = cut.rfind(" ")
+        if boundary > len(cut) // 2:
+            cut = cut[:boundary]
+        return cut, self.count(cut)
+
+class PromptBuilder:
+    """Fills a prompt template with paper sections fitted to a token budget
+
+    The template's fixed text is counted first. Sections then get up to their
+    cap in priority order, and tokens left over by short sections go, in the
+    same order, to sections that were cut at their cap.
+    """
+
+    def __init__(self, token_counter: TokenCounter, budget_tokens: int, section_budgets: List[Tuple[str, Optional[int]]] = SECTION_BUDGETS):
+        self.token_counter = token_counter
+        self.budget_tokens = budget_tokens
+        self.section_budgets = section_budgets
+
+    def build(self, template: str, sections: Dict[str, str], budget_tokens: Optional[int] = None, **fixed: str) -> str:
+        """Format template with the fitted sections and the fixed values, which are never cut
+
+        A fixed value may also fill a section's placeholder, taking it out of the fitting.
+        """
+        budget = self.budget_tokens if budget_tokens is None else budget_tokens
+        empty = {name: "" for name, _ in self.section_budgets}
+        overhead = self.token_counter.count(template.format(**{**empty, **fixed}))
+        fitted = self.fit(sections, budget - overhead)
+        return template.format(**{**fitted, **fixed})
+
+    def fit(self, sections: Dict[str, str], budget: int) -> Dict[str, str]:
+        fitted = {name: "" for name, _ in self.section_budgets}
+        used = {name: 0 for name, _ in self.section_budgets}
+        remaining = budget
+        for capped in (True, False):
+            for name, cap in self.section_budgets:
+                text = sections.get(name) or ""
+                if remaining <= 0 or not text or fitted[name] == text:
+                    continue
+                allowance = remaining + used[name]
+                if capped and cap is not None:
+                    allowance = min(allowance, cap)
+                fitted[name], tokens = self.token_counter.truncate(text, allowance)
+                remaining -= tokens - used[name]
+                used[name] = tokens
+        return fitted
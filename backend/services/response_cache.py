@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CacheKey = Tuple[str, str]
+
+# Preferred content codings, best compression first
+ENCODINGS = ("br", "gzip")
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    media_type: str
+    filename: Optional[str] = None
+    # Precompressed copies of body by content coding
+    encodings: Optional[Dict[str, bytes]] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(variant) for variant in (self.encodings or {}).values())
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """Compress a body once at maximum level for every available content coding"""
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return variants
+
+def choose_encoding(accept_encoding: Optional[str], available: Dict[str, bytes]) -> Optional[str]:
+    """Pick the best precompressed variant the client accepts, if any"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        try:
+            quality = float(params.strip()[2:]) if params.strip().startswith("q=") else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(coding.strip().lower())
+    for coding in ENCODINGS:
+        if coding in available and (coding in accepted or "*" in accepted):
+            return coding
+    return None
+
+class ResponseCache:
+    """Bounded LRU of rendered response bodies keyed by (paper_id, variant)"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 1000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.size = 0
+        self._entries: "OrderedDict[CacheKey, CachedBody]" = OrderedDict()
+        self._keys_by_paper: Dict[str, Set[CacheKey]] = {}
+
+    def get(self, key: CacheKey) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: CacheKey, entry: CachedBody):
+        """Store an entry, evicting the least recently used ones beyond the limits"""
+        if entry.size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        self._keys_by_paper.setdefault(key[0], set()).add(key)
+        self.size += entry.size
+        while self.size > self.max_bytes or len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, paper_id: str):
+        """Drop every cached variant of a paper, e.g. after it was reprocessed"""
+        for key in list(self._keys_by_paper.get(paper_id, ())):
+            self._remove(key)
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry.size
+        keys = self._keys_by_paper[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_paper[key[0]]
@@ -0,0 +1,229 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import time
+import uuid
+import zipfile
+import zlib
+import aiofiles
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+from fastapi import UploadFile
+
+PDF_MAGIC = b"%PDF"
+
+# Resumable upload sessions and their part files are dropped after a day
+SESSION_TTL_SECONDS = 24 * 3600
+
+# Reading one zip member can fail while the rest of the archive is fine: a bad CRC,
+# an encrypted member, an unsupported compression method or corrupt compressed data
+ZIP_MEMBER_ERRORS = (zipfile.BadZipFile, RuntimeError, NotImplementedError, zlib.error, EOFError)
+
+class UploadRejected(Exception):
+    """Raised when uploaded bytes fail validation while streaming in"""
+    pass
+
+class UploadConflict(UploadRejected):
+    """Raised when a resumable upload is written at a stale offset or by two requests at once"""
+    pass
+
+async def _unreadable_member(error: Exception) -> AsyncIterator[bytes]:
+    """Chunk stream of a zip member that could not be opened"""
+    raise UploadRejected(f"Could not read file from zip archive: {str(error)}")
+    yield
+
+class UploadStore:
+    """Content-addressed storage for uploaded PDF files"""
+
+    def __init__(self, root: Path, max_size: int = 50 * 1024 * 1024, chunk_size: int = 1024 * 1024):
+        self.root = Path(root)
+        self.max_size = max_size
+        self.chunk_size = chunk_size
+        self.sessions_dir = self.root / ".sessions"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.sessions_dir.mkdir(exist_ok=True)
+
+    def path_for(self, content_hash: str) -> Path:
+        """Return the storage path of a file with the given SHA-256 hash"""
+        return self.root / f"{content_hash}.pdf"
+
+    def _check_chunk(self, chunk: bytes, offset: int):
+        """Validate a chunk against the magic bytes and the size cap"""
+        # The magic bytes may straddle several small network chunks
+        if offset < len(PDF_MAGIC):
+            expected = PDF_MAGIC[offset:offset + len(chunk)]
+            if chunk[:len(expected)] != expected:
+                raise UploadRejected("File is not a valid PDF")
+        if offset + len(chunk) > self.max_size:
+            raise UploadRejected(f"File size must be less than {self.max_size // (1024 * 1024)}MB")
+
+    def _commit(self, tmp_path: Path, content_hash: str) -> Path:
+        """Move a fully written file to its content address, dropping duplicates"""
+        file_path = self.path_for(content_hash)
+        if file_path.exists():
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, file_path)
+        return file_path
+
+    async def save_stream(self, chunks: AsyncIterator[bytes]) -> Tuple[str, Path, int]:
+        """Write a byte stream to disk while hashing and validating it, returning (hash, path, size)"""
+        tmp_path = self.root / f".{uuid.uuid4()}.part"
+        hasher = hashlib.sha256()
+        size = 0
+
+        try:
+            async with aiofiles.open(tmp_path, "wb") as buffer:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    self._check_chunk(chunk, size)
+                    hasher.update(chunk)
+                    await buffer.write(chunk)
+                    size += len(chunk)
+
+            if size == 0:
+                raise UploadRejected("File is not a valid PDF")
+
+            content_hash = hasher.hexdigest()
+            file_path = await asyncio.to_thread(self._commit, tmp_path, content_hash)
+            return content_hash, file_path, size
+        finally:
+            if tmp_path.exists():
+                await asyncio.to_thread(tmp_path.unlink)
+
+    async def save(self, upload: UploadFile) -> Tuple[str, Path, int]:
+        """Stream a multipart upload to disk in bounded chunks"""
+        async def chunks():
+            while True:
+                chunk = await upload.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+        return await self.save_stream(chunks())
+
+    async def iter_zip_pdfs(self, fileobj: BinaryIO) -> AsyncIterator[Tuple[str, AsyncIterator[bytes]]]:
+        """Yield (filename, chunk stream) for every PDF inside a zip archive
+
+        Members are decompressed lazily in bounded chunks, so save_stream still
+        enforces the size cap on the real (not the declared) uncompressed size.
+        """
+        try:
+            archive = await asyncio.to_thread(zipfile.ZipFile, fileobj)
+        except zipfile.BadZipFile:
+            raise UploadRejected("File is not a valid zip archive")
+
+        with archive:
+            for info in archive.infolist():
+                name = Path(info.filename).name
+                if info.is_dir() or info.filename.startswith("__MACOSX/") or not name.lower().endswith(".pdf"):
+                    continue
+
+                # A bad member is rejected through its chunk stream, so the rest of the batch goes on
+                try:
+                    member = await asyncio.to_thread(archive.open, info)
+                except ZIP_MEMBER_ERRORS as e:
+                    yield name, _unreadable_member(e)
+                    continue
+                try:
+                    async def chunks(member=member):
+                        while True:
+                            try:
+                                chunk = await asyncio.to_thread(member.read, self.chunk_size)
+                            except ZIP_MEMBER_ERRORS as e:
+                                raise UploadRejected(f"Could not read file from zip archive: {str(e)}")
+                            if not chunk:
+                                break
+                            yield chunk
+
+                    yield name, chunks()
+                finally:
+                    member.close()
+
+    # Resumable uploads: chunks are appended to a per-session part file whose
+    # size is the authoritative offset, so a client can resume after a failure.
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.sessions_dir / f"{upload_id}.part"
+
+    def part_size(self, upload_id: str) -> int:
+        """Number of bytes received so far for a resumable upload"""
+        part_path = self._part_path(upload_id)
+        return part_path.stat().st_size if part_path.exists() else 0
+
+    def _lock_part(self, f):
+        """Take the part file's write lock without waiting; it is released when f is closed"""
+        # flock is shared by every worker process, and a crashed writer never leaves it held
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict("Another request is writing to this upload")
+
+    async def append_part(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Append a chunk stream at the given offset and return the new offset"""
+        async with aiofiles.open(self._part_path(upload_id), "ab") as buffer:
+            self._lock_part(buffer)
+            # Checked under the lock, so a resumed request can never append at a stale offset
+            current_offset = os.fstat(buffer.fileno()).st_size
+            if offset != current_offset:
+                raise UploadConflict(f"Offset mismatch, expected {current_offset}")
+
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                self._check_chunk(chunk, offset)
+                await buffer.write(chunk)
+                offset += len(chunk)
+
+        return offset
+
+    def _finalize(self, part_path: Path, expected_size: Optional[int]) -> Tuple[str, Path, int]:
+        with open(part_path, "rb") as f:
+            self._lock_part(f)
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                raise UploadRejected("No data received for this upload")
+            if expected_size is not None and size != expected_size:
+                raise UploadRejected(f"Received {size} bytes but the upload was declared as {expected_size} bytes")
+
+            hasher = hashlib.sha256()
+            for block in iter(lambda: f.read(self.chunk_size), b""):
+                hasher.update(block)
+            # Moved while still locked, so no request can append to the hashed file
+            content_hash = hasher.hexdigest()
+            return content_hash, self._commit(part_path, content_hash), size
+
+    async def finalize_part(self, upload_id: str, expected_size: Optional[int] = None) -> Tuple[str, Path, int]:
+        """Hash a completed resumable upload and move it to content-addressed storage
+
+        With expected_size, an upload of any other size is rejected.
+        """
+        part_path = self._part_path(upload_id)
+        if not part_path.exists():
+            raise UploadRejected("No data received for this upload")
+        return await asyncio.to_thread(self._finalize, part_path, expected_size)
+
+    async def discard_part(self, upload_id: str):
+        """Delete the partial data of an abandoned resumable upload"""
+        part_path = self._part_path(upload_id)
+        if part_path.exists():
+            await asyncio.to_thread(part_path.unlink)
+
+    def _remove_stale_parts(self, max_age_seconds: float) -> int:
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        # Session parts, plus temporary files left behind if the process died mid-upload
+        for part_path in list(self.sessions_dir.glob("*.part")) + list(self.root.glob(".*.part")):
+            try:
+                if part_path.stat().st_mtime < cutoff:
+                    part_path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    async def sweep_stale_parts(self, max_age_seconds: float = SESSION_TTL_SECONDS) -> int:
+        """Delete part files not written to for max_age_seconds, returning how many were removed"""
+        return await asyncio.to_thread(self._remove_stale_parts, max_age_seconds)
@@ -261,6 +261,26 @@ the reliability of ML systems in clinical settings."""
         print(f"Waiting for paper {self.paper_id} to complete processing (max {max_wait_time}s)...")
         start_time = time.time()
         
+        # Prefer the push stream; fall back to polling if it is unavailable
+        try:
+            response = requests.get(f"{API_BASE}/papers/{self.paper_id}/events", stream=True, timeout=max_wait_time)
+            if response.status_code == 200:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = json.loads(line[len("data:"):])
+                    status = data.get('status')
+                    print(f"Status: {status}, Progress: {data.get('progress', 0)}%")
+                    
+                    if status == 'completed':
+                        self.log_result("AI Processing", True, f"Paper processing completed successfully in {int(time.time() - start_time)}s")
+                        return True
+                    elif status == 'failed':
+                        self.log_result("AI Processing", False, "Paper processing failed")
+                        return False
+        except Exception as e:
+            print(f"Event stream unavailable, falling back to polling: {str(e)}")
+        
         while time.time() - start_time < max_wait_time:
             try:
                 response = requests.get(f"{API_BASE}/papers/{self.paper_id}/status", timeout=10)
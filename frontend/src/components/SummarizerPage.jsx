@@ -78,22 +78,30 @@ const SummarizerPage = () => {
       setCurrentPaper(paperResponse);
       toast.success('File uploaded! Processing started...');
 
+      // Returns true once processing has finished
+      const handleStatus = async (statusResponse) => {
+        setProgress(statusResponse.progress);
+
+        if (statusResponse.status === 'completed') {
+          setIsProcessing(false);
+          setShowResults(true);
+          await loadResults(paperResponse.id);
+          toast.success('Paper processed successfully!');
+          return true;
+        } else if (statusResponse.status === 'failed') {
+          setIsProcessing(false);
+          setError('Processing failed. Please try again.');
+          toast.error('Processing failed');
+          return true;
+        }
+        return false;
+      };
+
       // Poll for status updates
       const pollStatus = async () => {
         try {
           const statusResponse = await paperService.getPaperStatus(paperResponse.id);
-          setProgress(statusResponse.progress);
-
-          if (statusResponse.status === 'completed') {
-            setIsProcessing(false);
-            setShowResults(true);
-            await loadResults(paperResponse.id);
-            toast.success('Paper processed successfully!');
-          } else if (statusResponse.status === 'failed') {
-            setIsProcessing(false);
-            setError('Processing failed. Please try again.');
-            toast.error('Processing failed');
-          } else {
+          if (!(await handleStatus(statusResponse))) {
             // Continue polling
             setTimeout(pollStatus, 2000);
           }
@@ -103,8 +111,14 @@ const SummarizerPage = () => {
         }
       };
 
-      // Start polling
-      setTimeout(pollStatus, 1000);
+      // Listen for pushed updates, falling back to polling if the stream fails
+      if (window.EventSource) {
+        paperService.subscribeToPaperEvents(paperResponse.id, handleStatus, () => {
+          setTimeout(pollStatus, 1000);
+        });
+      } else {
+        setTimeout(pollStatus, 1000);
+      }
 
     } catch (err) {
       console.error('Processing error:', err);
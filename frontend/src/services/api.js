@@ -23,12 +23,48 @@ export const paperService = {
     return response.data;
   },
 
+  // Upload many PDFs or zip archives of PDFs as one batch
+  uploadBatch: async (files) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    
+    const response = await apiClient.post('/papers/batch', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    return response.data;
+  },
+
+  // Get aggregate progress of a batch
+  getBatchStatus: async (batchId) => {
+    const response = await apiClient.get(`/papers/batch/${batchId}`);
+    return response.data;
+  },
+
   // Get paper processing status
   getPaperStatus: async (paperId) => {
     const response = await apiClient.get(`/papers/${paperId}/status`);
     return response.data;
   },
 
+  // Subscribe to pushed status updates; returns an unsubscribe function
+  subscribeToPaperEvents: (paperId, onStatus, onError) => {
+    const source = new EventSource(`${API}/papers/${paperId}/events`);
+    source.addEventListener('status', (event) => {
+      const status = JSON.parse(event.data);
+      onStatus(status);
+      if (status.status === 'completed' || status.status === 'failed') {
+        source.close();
+      }
+    });
+    source.onerror = (err) => {
+      source.close();
+      if (onError) onError(err);
+    };
+    return () => source.close();
+  },
+
   // Get paper summary
   getPaperSummary: async (paperId) => {
     const response = await apiClient.get(`/papers/${paperId}/summary`);
@@ -49,10 +85,13 @@ export const paperService = {
     return response.data;
   },
 
-  // List all papers
-  listPapers: async () => {
-    const response = await apiClient.get('/papers');
-    return response.data;
+  // List papers, one page at a time (pass nextCursor back as `after`)
+  listPapers: async (params = {}) => {
+    const response = await apiClient.get('/papers', { params });
+    return {
+      papers: response.data,
+      nextCursor: response.headers['x-next-cursor'] || null,
+    };
   },
 };
 
@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+# The backend modules import each other as top-level packages (services, models)
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import os
+import pytest
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The server module against an in-memory Mongo, imported once per test session"""
+    import mongomock_motor
+    import motor.motor_asyncio
+    os.environ['UPLOAD_FOLDER'] = str(tmp_path_factory.mktemp("uploads"))
+    os.environ['LLM_CACHE'] = 'false'
+    os.environ['EMERGENT_LLM_KEY'] = 'test'
+    os.environ.pop('PROGRESS_CHANGE_STREAM', None)
+    # Must be patched before server creates its client at import time
+    motor.motor_asyncio.AsyncIOMotorClient = mongomock_motor.AsyncMongoMockClient
+    import server
+    yield server
+    server.pdf_processor.executor.shutdown()
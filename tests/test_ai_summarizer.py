@@ -0,0 +1,37 @@
+from services.ai_summarizer import AISummarizer
+from services.llm_client import LlmClient
+
+def make_summarizer(**kwargs) -> AISummarizer:
+    return AISummarizer(llm_client=LlmClient(api_key="test", system_message="test"), **kwargs)
+
+def test_reduce_prompt_keeps_every_note():
+    summarizer = make_summarizer(map_reduce=True, prompt_tokens=4000)
+    paper = {
+        "title": "A Long Paper",
+        "abstract": "Abstract sentence. " * 200,
+        "introduction": "Introduction sentence. " * 300,
+        "conclusion": "Conclusion sentence. " * 200,
+    }
+    # Far more note text than the prompt budget, as for a book-length paper
+    notes = [f"- finding {i} " + "with supporting detail " * 100 for i in range(1, 27)]
+    prompt = summarizer._build_prompt(paper, section_notes=notes)
+    for i in range(1, 27):
+        assert f"Part {i}:" in prompt
+        assert f"finding {i} " in prompt
+    # The notes do not crowd out the other sections
+    assert "Abstract sentence." in prompt
+    assert "Conclusion sentence." in prompt
+
+def test_excerpt_prompt_stays_within_budget():
+    summarizer = make_summarizer(prompt_tokens=2000)
+    paper = {"title": "A Long Paper", "full_text": "Body sentence. " * 20000}
+    prompt = summarizer._build_prompt(paper)
+    assert summarizer.token_counter.count(prompt) <= 2000
+
+def test_chunks_stay_within_chunk_tokens_and_cover_the_text():
+    summarizer = make_summarizer(chunk_tokens=500)
+    text = "\n".join(f"Paragraph {i}. " + "Some words in a sentence. " * 30 for i in range(200))
+    chunks = summarizer._split_chunks(text)
+    assert len(chunks) > 1
+    assert all(summarizer.token_counter.count(chunk) <= 500 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
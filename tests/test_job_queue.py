@@ -0,0 +1,28 @@
+import asyncio
+from services.job_queue import JobQueue
+
+class FlakyCollection:
+    """Records lease renewals and fails the first one"""
+
+    def __init__(self):
+        self.renewals = 0
+        self.calls = 0
+
+    async def update_one(self, query, update):
+        self.calls += 1
+        if self.calls == 1:
+            raise ConnectionError("primary stepped down")
+        self.renewals += 1
+
+def test_lease_renewal_survives_a_failed_write():
+    collection = FlakyCollection()
+    queue = JobQueue(collection, handler=None, lease_seconds=0.03)
+
+    async def run():
+        heartbeat = asyncio.create_task(queue._renew_lease("job"))
+        await asyncio.sleep(0.1)
+        assert not heartbeat.done()
+        heartbeat.cancel()
+
+    asyncio.run(run())
+    assert collection.renewals >= 2
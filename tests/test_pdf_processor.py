@@ -0,0 +1,59 @@
+import asyncio
+import multiprocessing
+import os
+import PyPDF2
+from concurrent.futures import ProcessPoolExecutor
+from services.pdf_processor import PDFProcessor, index_sections
+
+def headings(text):
+    return [(section.kind, section.number) for section in index_sections(text)]
+
+def test_named_headings_with_and_without_numbers():
+    text = "Abstract\nWe study things.\n1. Introduction\nIt matters.\n5 Conclusion: it works.\nReferences\n[1] A."
+    assert headings(text) == [("abstract", None), ("introduction", "1"), ("conclusion", "5"), ("references", None)]
+
+def test_dotted_and_short_numbered_titles():
+    text = "2. Related Work\ntext\n2.1 Data Collection\ntext\n3 Results\ntext\n4.2.1. Ablation of the Encoder\ntext"
+    assert headings(text) == [("section", "2"), ("section", "2.1"), ("section", "3"), ("section", "4.2.1")]
+
+def test_wrapped_sentence_starting_with_a_number_is_not_a_heading():
+    text = (
+        "1. Introduction\n"
+        "Adoption of clinical decision support has grown quickly. In our survey,\n"
+        "12 Hospitals adopted the new system within a year, and most reported\n"
+        "fewer errors.\n"
+        "2. Methods\n"
+        "We interviewed staff."
+    )
+    assert headings(text) == [("introduction", "1"), ("section", "2")]
+    introduction = PDFProcessor().parse_academic_paper(text)['introduction']
+    assert "12 Hospitals adopted the new system" in introduction
+    assert introduction.endswith("fewer errors.")
+
+def test_numbered_lines_with_sentence_punctuation_are_not_headings():
+    text = "1. Introduction\nIntro text\n3 Patients, all adults, were enrolled\n2.4 Percent of cases were missed.\nMore text"
+    assert headings(text) == [("introduction", "1")]
+
+def test_extraction_recovers_after_a_pool_worker_dies(tmp_path):
+    pdf_path = tmp_path / "blank.pdf"
+    writer = PyPDF2.PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+
+    processor = PDFProcessor(executor_factory=lambda: ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")))
+
+    async def run():
+        broken = processor.executor
+        # A worker exiting abruptly, as when the OOM killer stops it, breaks the whole pool
+        try:
+            await asyncio.get_running_loop().run_in_executor(broken, os._exit, 1)
+        except Exception:
+            pass
+        try:
+            assert await processor.extract_text_from_file(str(pdf_path)) == ""
+            assert processor.executor is not broken
+        finally:
+            processor.executor.shutdown()
+
+    asyncio.run(run())
@@ -0,0 +1,43 @@
+import asyncio
+from models import ProcessingStatus
+from services.progress_tracker import ProgressTracker
+
+class SlowCollection:
+    """Records writes in the order they complete; the first write is slow"""
+
+    def __init__(self):
+        self.writes = []
+        self.calls = 0
+
+    async def update_one(self, filter, update):
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.sleep(0.05)
+        self.writes.append(update["$set"])
+
+def test_terminal_status_is_written_after_an_inflight_flush():
+    async def run():
+        collection = SlowCollection()
+        tracker = ProgressTracker(collection, flush_interval_ms=1)
+        await tracker.update("paper", status=ProcessingStatus.PROCESSING, processing_progress=70)
+        # Let the delayed flush start its (slow) write
+        await asyncio.sleep(0.01)
+        await tracker.update("paper", status=ProcessingStatus.COMPLETED, processing_progress=100)
+        return collection.writes, tracker
+
+    writes, tracker = asyncio.run(run())
+    assert [write["status"] for write in writes] == [ProcessingStatus.PROCESSING, ProcessingStatus.COMPLETED]
+    assert tracker.get("paper") is None
+
+def test_updates_are_coalesced_into_one_write():
+    async def run():
+        collection = SlowCollection()
+        tracker = ProgressTracker(collection, flush_interval_ms=10)
+        for progress in (10, 30, 50):
+            await tracker.update("paper", status=ProcessingStatus.PROCESSING, processing_progress=progress)
+        await asyncio.sleep(0.1)
+        return collection.writes
+
+    writes = asyncio.run(run())
+    assert len(writes) == 1
+    assert writes[0]["processing_progress"] == 50
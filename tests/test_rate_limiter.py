@@ -0,0 +1,34 @@
+import asyncio
+import time
+from services.llm_client import RateLimiter
+
+def admitted_tokens(limiter: RateLimiter, request_tokens: int, seconds: float) -> int:
+    """Tokens let through by the limiter within a time window"""
+    async def run():
+        admitted = 0
+        deadline = time.monotonic() + seconds
+        while True:
+            await limiter.acquire(request_tokens)
+            if time.monotonic() > deadline:
+                return admitted
+            admitted += request_tokens
+    return asyncio.run(run())
+
+def test_requests_larger_than_the_bucket_are_charged_in_full():
+    # 10,000 tokens per second with a 1,000-token bucket
+    limiter = RateLimiter(tokens_per_minute=600000, burst_seconds=0.1)
+    admitted = admitted_tokens(limiter, request_tokens=5000, seconds=1)
+    # Each request leaves a debt that takes half a second to pay off
+    assert admitted <= 10000 + 5000
+
+def test_small_requests_stay_within_the_rate():
+    limiter = RateLimiter(tokens_per_minute=600000, burst_seconds=0.1)
+    admitted = admitted_tokens(limiter, request_tokens=100, seconds=1)
+    # Burst capacity plus one second of refill
+    assert admitted <= 1000 + 10000 + 100
+
+def test_no_limits_never_wait():
+    limiter = RateLimiter()
+    started = time.monotonic()
+    asyncio.run(limiter.acquire(10 ** 9))
+    assert time.monotonic() - started < 0.1
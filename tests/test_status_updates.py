@@ -0,0 +1,31 @@
+import asyncio
+import uuid
+
+def test_status_stream_sees_changes_made_by_another_worker(server):
+    async def run():
+        paper_id = str(uuid.uuid4())
+        await server.db.papers.insert_one({"id": paper_id, "status": "processing", "processing_progress": 10})
+        updates = server.status_updates(paper_id, keepalive=0.05)
+        first = await updates.__anext__()
+        assert (first.status, first.progress) == ("processing", 10)
+        # Written by another process, so no event reaches this process's broker
+        await server.db.papers.update_one({"id": paper_id}, {"$set": {"status": "completed", "processing_progress": 100}})
+        statuses = [status async for status in updates if status is not None]
+        assert [(status.status, status.progress) for status in statuses] == [("completed", 100)]
+    asyncio.run(asyncio.wait_for(run(), 5))
+
+def test_summary_stream_finishes_when_another_worker_stores_the_summary(server, monkeypatch):
+    monkeypatch.setattr(server, "SUMMARY_STREAM_KEEPALIVE", 0.05)
+
+    async def run():
+        paper_id = str(uuid.uuid4())
+        await server.db.papers.insert_one({"id": paper_id, "status": "processing", "processing_progress": 60})
+        response = await server.stream_paper_summary(paper_id)
+        events = response.body_iterator
+        await server.db.summaries.insert_one({
+            "paper_id": paper_id, "title": "T", "introduction": "I", "key_points": [],
+            "conclusion": "C", "implications": []
+        })
+        body = "".join([event async for event in events])
+        assert "event: title" in body and body.endswith("event: done\ndata: null\n\n")
+    asyncio.run(asyncio.wait_for(run(), 5))
@@ -0,0 +1,100 @@
+import asyncio
+import io
+import zipfile
+from services.upload_store import UploadConflict, UploadRejected, UploadStore
+
+PDF = b"%PDF-1.4\n" + b"x" * 2000 + b"\n%%EOF\n"
+
+def save_zip_members(store: UploadStore, archive: bytes):
+    """Save every PDF in the archive, returning the saved and the rejected member names"""
+    async def run():
+        saved, rejected = [], []
+        async for name, chunks in store.iter_zip_pdfs(io.BytesIO(archive)):
+            try:
+                await store.save_stream(chunks)
+                saved.append(name)
+            except UploadRejected:
+                rejected.append(name)
+        return saved, rejected
+    return asyncio.run(run())
+
+def corrupt_member(archive: bytes, data: bytes) -> bytes:
+    """Flip one byte in the middle of a member's stored data"""
+    position = archive.index(data) + len(data) // 2
+    return archive[:position] + bytes([archive[position] ^ 0xFF]) + archive[position + 1:]
+
+def build_zip(members, compression=zipfile.ZIP_STORED) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def test_member_with_bad_crc_is_rejected_and_the_rest_saved(tmp_path):
+    broken = b"%PDF-1.4\n" + b"y" * 2000
+    archive = corrupt_member(build_zip([("good.pdf", PDF), ("bad.pdf", broken), ("other.pdf", PDF + b"2")]), broken)
+    saved, rejected = save_zip_members(UploadStore(tmp_path), archive)
+    assert saved == ["good.pdf", "other.pdf"]
+    assert rejected == ["bad.pdf"]
+    # The rejected member leaves no partial file behind
+    assert not list(tmp_path.glob(".*.part"))
+
+def test_member_with_corrupt_compressed_data_is_rejected(tmp_path):
+    archive = build_zip([("good.pdf", PDF), ("bad.pdf", PDF + b"2")], zipfile.ZIP_DEFLATED)
+    info = zipfile.ZipFile(io.BytesIO(archive)).getinfo("bad.pdf")
+    start = info.header_offset + 30 + len(info.filename)
+    archive = archive[:start] + b"\xff" * 8 + archive[start + 8:]
+    saved, rejected = save_zip_members(UploadStore(tmp_path), archive)
+    assert saved == ["good.pdf"]
+    assert rejected == ["bad.pdf"]
+
+def test_concurrent_append_to_one_upload_is_a_conflict(tmp_path):
+    store = UploadStore(tmp_path)
+
+    async def run():
+        first_started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_chunks():
+            yield PDF[:100]
+            first_started.set()
+            await release.wait()
+            yield PDF[100:]
+
+        async def resumed_chunks():
+            yield PDF
+
+        first = asyncio.create_task(store.append_part("upload", 0, slow_chunks()))
+        await first_started.wait()
+        # A client that timed out resumes from the offset it last saw
+        try:
+            await store.append_part("upload", 0, resumed_chunks())
+        except UploadConflict:
+            conflict = True
+        else:
+            conflict = False
+        release.set()
+        return conflict, await first
+
+    conflict, offset = asyncio.run(run())
+    assert conflict
+    assert offset == len(PDF)
+    assert (tmp_path / ".sessions" / "upload.part").read_bytes() == PDF
+
+def test_finalize_rejects_a_size_other_than_declared(tmp_path):
+    store = UploadStore(tmp_path)
+
+    async def chunks():
+        yield PDF[:500]
+
+    async def run():
+        await store.append_part("upload", 0, chunks())
+        try:
+            await store.finalize_part("upload", expected_size=len(PDF))
+        except UploadRejected:
+            rejected = True
+        else:
+            rejected = False
+        content_hash, _, size = await store.finalize_part("upload", expected_size=500)
+        return rejected, size
+
+    assert asyncio.run(run()) == (True, 500)